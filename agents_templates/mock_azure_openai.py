@@ -0,0 +1,102 @@
+"""
+Module: mock_azure_openai.py
+Local stand-in for Azure OpenAI chat completions, for checking LLM deployment routing and failover
+in generated agents without real deployments.
+
+Each deployment behaves as configured in MOCK_DEPLOYMENTS, e.g.
+    {"fast": {"latency": 0.05}, "slow": {"latency": 1.0}, "busy": {"status": 429}}
+(latency in seconds, status returned instead of a completion, fail_rate for random failures).
+Behaviour can be changed while running with PUT /mock/deployments/{deployment}, and
+GET /mock/stats shows how many calls each deployment received.
+
+Run:  uvicorn mock_azure_openai:app --port 9000
+Then start an agent with
+    AZURE_OPENAI_DEPLOYMENTS='[{"endpoint": "http://127.0.0.1:9000", "deployment": "fast"},
+                               {"endpoint": "http://127.0.0.1:9000", "deployment": "slow"}]'
+and compare /mock/stats with the agent's GET /llm/deployments.
+"""
+import os
+import json
+import time
+import uuid
+import random
+import asyncio
+from collections import Counter
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+
+app = FastAPI()
+
+DEFAULT_BEHAVIOUR = {"latency": 0.05, "status": 200, "fail_rate": 0.0}
+behaviours = json.loads(os.environ.get("MOCK_DEPLOYMENTS") or "{}")
+calls = Counter()
+failures = Counter()
+
+
+def get_behaviour(deployment: str) -> dict:
+    return {**DEFAULT_BEHAVIOUR, **behaviours.get(deployment, {})}
+
+
+def completion_chunk(deployment: str, completion_id: str, delta: dict, finish_reason=None) -> str:
+    chunk = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": deployment,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+    }
+    return f"data: {json.dumps(chunk)}\n\n"
+
+
+@app.post("/openai/deployments/{deployment}/chat/completions")
+async def chat_completions(deployment: str, request: Request):
+    body = await request.json()
+    behaviour = get_behaviour(deployment)
+    calls[deployment] += 1
+    await asyncio.sleep(behaviour["latency"])
+    status = behaviour["status"]
+    if status == 200 and random.random() < behaviour["fail_rate"]:
+        status = 503
+    if status != 200:
+        failures[deployment] += 1
+        return JSONResponse(
+            status_code=status,
+            content={"error": {"code": str(status), "message": f"Mock failure from deployment {deployment}"}},
+            headers={"Retry-After": "1"} if status == 429 else None
+        )
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    content = f"Answer from mock deployment {deployment}"
+    if body.get("stream"):
+        async def stream():
+            yield completion_chunk(deployment, completion_id, {"role": "assistant", "content": ""})
+            yield completion_chunk(deployment, completion_id, {"content": content})
+            yield completion_chunk(deployment, completion_id, {}, "stop")
+            yield "data: [DONE]\n\n"
+        return StreamingResponse(stream(), media_type="text/event-stream")
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": deployment,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    }
+
+
+@app.put("/mock/deployments/{deployment}")
+async def set_behaviour(deployment: str, behaviour: dict):
+    behaviours[deployment] = {**behaviours.get(deployment, {}), **behaviour}
+    return get_behaviour(deployment)
+
+
+@app.get("/mock/stats")
+async def stats():
+    return {
+        deployment: {"calls": calls[deployment], "failures": failures[deployment], **get_behaviour(deployment)}
+        for deployment in sorted(set(calls) | set(behaviours))
+    }
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="127.0.0.1", port=int(os.environ.get("MOCK_PORT", "9000")))
@@ -89,6 +89,7 @@ if st.session_state.framework_name and st.session_state.creds_schema:
                     }
                     resp = requests.post(f"{API_BASE}/api/agents", json=payload)
                     resp.raise_for_status()
+                    # Azure deployments are queued (202): agent_info holds the id and the queue position
                     agent_info = resp.json()
                     # Poll for status and endpoint
                     status_url = f"{API_BASE}/api/agents/{agent_info['id']}/status"
@@ -102,7 +103,7 @@ if st.session_state.framework_name and st.session_state.creds_schema:
                         endpoint_resp = requests.get(endpoint_url)
                         endpoint_resp.raise_for_status()
                         endpoint = endpoint_resp.json().get("endpoint", "")
-                        if status == "running" and endpoint:
+                        if (status in ("running", "deployed") and endpoint) or status == "failed":
                             break
                         time.sleep(2)
                     st.session_state.agent_deploy_result = {
@@ -1,144 +1,472 @@
 import os
+import json
+import asyncio
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import APIRouter, HTTPException
-from app.models.agent import AgentCreateRequest, AgentInfo
-from app.services.agent_registry import register_agent, get_agent, get_all_agents
-from app.services.agent_creator import render_agent_code, save_agent_code, get_agent_id
-import jsonschema
-from app.services.framework_registry import FRAMEWORKS, get_framework_creds_schema
-import time
-from app.services.github_push import push_agent_to_github
-from app.services.azure_deploy import trigger_github_workflow, download_deployed_url_artifact
-from app.services.agent_registry import update_agent, get_agent
+from fastapi.concurrency import run_in_threadpool, iterate_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.models.agent import AgentCreateRequest, AgentBatchCreateRequest, AgentInfo, AgentQueuedInfo
+from app.services.agents_studio.agent_registry import register_agent, update_agent, get_agent, get_all_agents, get_agents_by_user
+from app.services.agents_studio.agent_creator import render_agent_code, save_agent_code, get_agent_id, get_artifact_basename
+from app.services.agents_studio.framework_registry import FRAMEWORKS, validate_framework_creds
+from app.services.agents_studio.github_push import push_agent_to_github, push_files_to_github, build_agent_bundle, get_agent_remote_path
+from app.services.agents_studio.azure_deploy import dispatch_batch_deploy, iter_batch_deploy_results, split_batch_deploy
+from app.services.agents_studio.deployers import get_deployer
+from app.services.agents_studio.artifact_store import build_runtime_env, compute_content_hash, get_artifact, record_artifact, seal_runtime_env
+from app.services.agents_studio.deployment_scheduler import get_deployment_scheduler, DeploymentTicket, QueueFullError
+from app.services.agents_studio.catalog_cache import FastJSONResponse
 router = APIRouter()
 
+DEPLOY_SLOT_TIMEOUT = float(os.environ.get("DEPLOY_SLOT_TIMEOUT", "600"))
+MAX_BATCH_SIZE = 100  # one page of matrix jobs; bigger dispatch inputs are split into several runs
 
+# Queued deployments run as tasks of their own, independent of the request that queued them;
+# references are kept here until they finish.
+deployment_tasks = set()
 
-@router.post("/agents", response_model=AgentInfo)
-def create_agent(agent_req: AgentCreateRequest):
+
+def validate_agent_request(agent_req: AgentCreateRequest):
     # Validate framework
-    framework = agent_req.framework
-    fw_record = next((f for f in FRAMEWORKS if f["name"] == framework), None)
+    fw_record = next((f for f in FRAMEWORKS if f["name"] == agent_req.framework), None)
     if not fw_record:
         raise HTTPException(status_code=400, detail="Invalid framework")
     # Validate credentials
     try:
-        schema = get_framework_creds_schema(framework)
-        jsonschema.validate(agent_req.credentials, schema)
+        validate_framework_creds(agent_req.framework, agent_req.credentials)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid credentials: {e}")
-    # Prepare template context
-    context = dict(agent_req.credentials)
-    context["mcp_servers"] = [tool.model_dump() for tool in agent_req.tools]
-    context["system_message"] = agent_req.prompt
-    import os
-    context["agent_name"] = f"agent_{framework}_{ os.urandom(4).hex()}"
-    # Map credential values to template variables for all frameworks
-    context["llm_api_key"] = agent_req.credentials.get("AZURE_OPENAI_API_KEY") or agent_req.credentials.get("OPENAI_API_KEY") or ""
-    context["llm_endpoint"] = agent_req.credentials.get("AZURE_OPENAI_ENDPOINT") or agent_req.credentials.get("OPENAI_API_BASE") or ""
-    context["llm_api_version"] = agent_req.credentials.get("AZURE_OPENAI_API_VERSION") or ""
-    context["llm_model"] = agent_req.credentials.get("AZURE_OPENAI_DEPLOYMENT") or agent_req.credentials.get("OPENAI_DEPLOYMENT_NAME") or ""
+
+
+def build_template_context(prompt: str, tools: list) -> dict:
+    # Credentials are not rendered into the code; they are injected into the
+    # container as environment variables at deploy time.
+    context = {}
+    context["mcp_servers"] = tools
+    context["system_message"] = prompt
     # Ensure both mcp_servers and mcp_urls are available for template compatibility
-    context["mcp_urls"] = [tool["url"] if isinstance(tool, dict) else tool.url for tool in context["mcp_servers"]]
-    print("[DEBUG] Agent creation context:", context)
-    
-    # Add any other mappings as needed for other templates
-    # Render agent code
+    context["mcp_urls"] = [tool["url"] for tool in tools]
+    return context
+
+
+def enqueue_deployment(user_id, priority: str, cost: float = 1.0, slots: int = 1) -> DeploymentTicket:
+    """
+    Queues a deployment with the shared scheduler and returns its ticket, which must be waited on
+    right away with `async with scheduler.slot(ticket)`. Raises 429 (with Retry-After) when the
+    queue is too deep.
+    """
     try:
-        code = render_agent_code(framework, context)
+        ticket = get_deployment_scheduler().enqueue(user_id, priority, cost, slots)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    print(f"[DEBUG] deployment {ticket.id} queued at position {get_deployment_scheduler().get_position(ticket.id)} ({priority}, {ticket.slots} slots)")
+    return ticket
+
+
+def start_deployment_task(coro):
+    task = asyncio.create_task(coro)
+    deployment_tasks.add(task)
+    task.add_done_callback(deployment_tasks.discard)
+    return task
+
+
+def error_detail(e: Exception) -> str:
+    return str(getattr(e, "detail", None) or e)
+
+
+@router.post("/agents", status_code=202, response_model=AgentQueuedInfo, responses={200: {"model": AgentInfo, "description": "Local preview started"}})
+async def create_agent(agent_req: AgentCreateRequest):
+    """
+    Local previews are started right away and returned (200, AgentInfo). Azure deployments are
+    queued: the response is 202 with the agent id, the deployment ticket id and its queue position (see
+    /deployments/queue/{ticket_id}); the agent's status then moves from "queued" through
+    "deploying" to "deployed" or "failed" (with an error) in /agents/{agent_id}.
+    """
+    validate_agent_request(agent_req)
+    if agent_req.deploy_target == "local":
+        # Local previews do not use CI runners or Azure quota, so they skip the deployment queue.
+        agent = await run_in_threadpool(preview_agent, agent_req)
+        return JSONResponse(status_code=200, content=AgentInfo.model_validate(agent).model_dump(mode="json"))
+    ticket = enqueue_deployment(agent_req.user_id, "interactive")
+    app_name = get_agent_id({"framework": agent_req.framework})
+    try:
+        agent_id = await run_in_threadpool(register_agent, {
+            "user_id": agent_req.user_id,
+            "status": "queued",
+            "endpoint": "",
+            "tools": agent_req.tools,
+            "framework": agent_req.framework,
+            "prompt": agent_req.prompt,
+            "app_name": app_name
+        })
+    except Exception:
+        get_deployment_scheduler().release(ticket)
+        raise
+    start_deployment_task(run_queued_deployment(ticket, agent_id, app_name, agent_req))
+    return AgentQueuedInfo(
+        id=agent_id,
+        app_name=app_name,
+        ticket_id=ticket.id,
+        position=get_deployment_scheduler().get_position(ticket.id)
+    )
+
+
+async def run_queued_deployment(ticket: DeploymentTicket, agent_id: str, app_name: str, agent_req: AgentCreateRequest):
+    """
+    Waits for the ticket's slot without holding a thread, then deploys in a worker thread.
+    Failures are recorded on the agent.
+    """
+    try:
+        async with get_deployment_scheduler().slot(ticket, timeout=DEPLOY_SLOT_TIMEOUT):
+            await run_in_threadpool(update_agent, agent_id, {"status": "deploying"})
+            await run_in_threadpool(deploy_agent, agent_req, agent_id, app_name)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Template rendering failed: {e}")
-    # Save generated code
-    agent_id = get_agent_id({
-        "status": "created",
-        "endpoint": "",
-        "tools": agent_req.tools,
+        print(f"[DEBUG] deployment of {app_name} failed: {error_detail(e)}")
+        await run_in_threadpool(update_agent, agent_id, {"status": "failed", "error": error_detail(e)})
+
+
+def deploy_agent(agent_req: AgentCreateRequest, agent_id: str, app_name: str):
+    """
+    Renders (or reuses), pushes and deploys a registered agent, then records the result on it.
+    """
+    framework = agent_req.framework
+    tools = [tool.model_dump() for tool in agent_req.tools]
+    context = build_template_context(agent_req.prompt, tools)
+    runtime_env = build_runtime_env(agent_req.credentials, agent_req.response_cache_ttl)
+    content_hash = compute_content_hash(framework, agent_req.prompt, tools)
+    artifact = get_artifact(content_hash)
+    print(f"[DEBUG] content_hash: {content_hash} (cached artifact: {bool(artifact)})")
+
+    # app_name is the container app name; unique per request even when the code is shared
+    runtime_env["AGENT_NAME"] = app_name
+    print(f"[DEBUG] app_name (truncated): {app_name}")
+    ref = os.environ.get("GITHUB_REF", "main")
+    if artifact:
+        # Identical template inputs were deployed before: reuse the commit and image.
+        commit_sha = artifact["commit_sha"]
+        agent_remote_path = artifact["agent_file"]
+    else:
+        # Render agent code
+        try:
+            code = render_agent_code(framework, context)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Template rendering failed: {e}")
+        # Save generated code
+        code_path = save_agent_code(get_artifact_basename(framework, content_hash), code)
+        print(f"[DEBUG] code_path: {code_path}")
+        agent_remote_path = get_agent_remote_path(framework, code_path)
+        print(f"[DEBUG] agent_remote_path: {agent_remote_path}")
+        # 1. Push to GitHub
+        try:
+            repo_url = os.environ.get("GITHUB_REPO_URL")
+            commit_sha = push_agent_to_github(
+                agent_file_path=code_path,
+                framework=framework,
+                repo_url=repo_url,
+                branch=ref,
+                agent_config={"content_hash": content_hash}
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to push agent to GitHub: {e}")
+    # 2. Deploy through the Azure Container Apps workflow and get the deployed URL
+    spec = {
+        "sha": commit_sha,
+        "agent_file": agent_remote_path,
         "framework": framework,
-        "prompt": agent_req.prompt
+        "app_name": app_name,
+        "content_hash": content_hash,
+        "skip_build": "true" if artifact else "false",
+        "agent_env": seal_runtime_env(runtime_env)
+    }
+    print(f"[DEBUG] Deploying {app_name} to azure (skip_build={spec['skip_build']})")
+    try:
+        result = get_deployer("azure").deploy(spec)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Azure deployment failed: {e}")
+    if not artifact:
+        record_artifact(content_hash, {
+            "framework": framework,
+            "commit_sha": commit_sha,
+            "agent_file": agent_remote_path
+        })
+    # 3. Record the deployment on the agent
+    update_agent(agent_id, {
+        "status": result["status"],
+        "endpoint": result["endpoint"],
+        "content_hash": content_hash,
+        "commit_sha": commit_sha,
+        "run_id": result["run_id"]
     })
-    print(f"[DEBUG] agent_id (truncated): {agent_id}")
-    agent_filename = f"{agent_id}.py"
-    code_path = save_agent_code(agent_id, code)
-    print(f"[DEBUG] code_path: {code_path}")
-    print(f"[DEBUG] agent_filename: {agent_filename}")
-    agent_remote_path = f"agents/{framework}/{agent_filename}"
-    print(f"[DEBUG] agent_remote_path: {agent_remote_path}")
-    # 1. Push to GitHub
+    agent_info = get_agent(agent_id)
+    if not agent_info:
+        raise HTTPException(status_code=404, detail="Agent not found after creation.")
+    return agent_info
+
+
+def preview_agent(agent_req: AgentCreateRequest):
+    """
+    Renders the agent and runs it as a local subprocess (no GitHub/Azure); returns in seconds.
+    """
+    framework = agent_req.framework
+    tools = [tool.model_dump() for tool in agent_req.tools]
+    content_hash = compute_content_hash(framework, agent_req.prompt, tools)
     try:
-        repo_url = os.environ.get("GITHUB_REPO_URL")
-        branch = os.environ.get("GITHUB_REF", "main")
-        commit_sha = push_agent_to_github(
-            agent_file_path=code_path,
-            framework=framework,
-            repo_url=repo_url,
-            branch=branch
-        )
+        code = render_agent_code(framework, build_template_context(agent_req.prompt, tools))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to push agent to GitHub: {e}")
-    # 2. Trigger Azure deploy workflow
+        raise HTTPException(status_code=500, detail=f"Template rendering failed: {e}")
+    code_path = save_agent_code(get_artifact_basename(framework, content_hash), code)
+    app_name = get_agent_id({"framework": framework})
+    runtime_env = build_runtime_env(agent_req.credentials, agent_req.response_cache_ttl)
+    runtime_env["AGENT_NAME"] = app_name
     try:
-        repo = os.environ.get("GITHUB_REPO")
-        workflow_file = "deploy-agent.yml"
-        agent_filename = os.path.basename(code_path)
-        agent_remote_path = f"agents/{framework}/{agent_filename}"
-        inputs = {
-            "sha": commit_sha,
-            "agent_file": agent_remote_path,
-            "framework": framework
-        }
-        ref = os.environ.get("GITHUB_REF", "main")
-        print(f"[DEBUG] Triggering workflow with inputs: {inputs}")
-        run_id = trigger_github_workflow(repo, workflow_file, ref, inputs)
-        print(f"[DEBUG] Workflow run_id: {run_id}")
-        agent_id = register_agent({
+        result = get_deployer("local").deploy({"app_name": app_name, "code_path": code_path, "runtime_env": runtime_env})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Local preview failed: {e}")
+    agent_id = register_agent({
         "user_id": agent_req.user_id,
-        "status": "created",
-        "endpoint": "",
+        "status": result["status"],
+        "endpoint": result["endpoint"],
         "tools": agent_req.tools,
         "framework": framework,
-        "prompt": agent_req.prompt
+        "prompt": agent_req.prompt,
+        "app_name": app_name,
+        "content_hash": content_hash
     })
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to trigger Azure deploy workflow: {e}")
-    # 3. Wait and get deployed URL
-    #
+    return get_agent(agent_id)
+
+@router.post("/agents:batch")
+async def create_agents_batch(batch_req: AgentBatchCreateRequest):
+    """
+    Creates many agents with one render pass, one commit and one matrix workflow run per user in
+    the batch. Each user's part is one deployment ticket holding as many slots as its matrix runs
+    jobs in parallel, so bulk work counts against MAX_CONCURRENT_DEPLOYMENTS and is queued fairly
+    per user. Responds with NDJSON: a "queued" line with the tickets, then per part an "accepted"
+    line listing its agents once it has been dispatched, one "agent" line per agent as soon as its
+    deploy job finishes, and a final "completed" summary line. Agents of a part that fails before
+    its run finishes are reported as failed "agent" lines with the error.
+    """
+    if not batch_req.agents:
+        raise HTTPException(status_code=400, detail="No agents given")
+    if len(batch_req.agents) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SIZE} agents per batch")
+    for index, agent_req in enumerate(batch_req.agents):
+        try:
+            validate_agent_request(agent_req)
+        except HTTPException as e:
+            raise HTTPException(status_code=e.status_code, detail=f"agents[{index}]: {e.detail}")
+        if agent_req.deploy_target != "azure":
+            raise HTTPException(status_code=400, detail=f"agents[{index}]: batch deploys only support deploy_target 'azure'")
+    by_user = {}
+    for index, agent_req in enumerate(batch_req.agents):
+        by_user.setdefault(agent_req.user_id, []).append((index, agent_req))
+    parts = []
     try:
-        max_retries = 6  # Increased for robustness
-        retry_delay = 10
-        endpoint = None
-        agent_base = os.path.splitext(os.path.basename(agent_remote_path))[0]
-        artifact_name = f"deployed-url-{framework}-{agent_base}"
-        print(f"[DEBUG] agent_remote_path: {agent_remote_path}")
-        print(f"[DEBUG] agent_base: {agent_base}")
-        print(f"[DEBUG] expected artifact_name: {artifact_name}")
-        for attempt in range(max_retries):
-            print(f"[DEBUG] Poll attempt {attempt+1}/{max_retries}")
-            # Print all artifact names found
-            repo_artifacts_url = f"https://api.github.com/repos/{repo}/actions/runs/{run_id}/artifacts"
-            import requests, os
-            headers = {"Authorization": f"token {os.environ.get('GITHUB_TOKEN')}", "Accept": "application/vnd.github+json"}
-            resp = requests.get(repo_artifacts_url, headers=headers)
-            if resp.ok:
-                artifacts = resp.json().get("artifacts", [])
-                print(f"[DEBUG] Artifacts found: {[a['name'] for a in artifacts]}")
+        for user_id, members in by_user.items():
+            ticket = enqueue_deployment(user_id, "bulk", cost=len(members), slots=len(members))
+            parts.append({"ticket": ticket, "members": members})
+    except HTTPException:
+        for part in parts:
+            get_deployment_scheduler().release(part["ticket"])
+        raise
+    events = asyncio.Queue()
+    for part in parts:
+        start_deployment_task(run_batch_part(part["ticket"], part["members"], events))
+    queued = {
+        "event": "queued",
+        "tickets": [
+            {
+                "ticket_id": part["ticket"].id,
+                "user_id": part["ticket"].user_id,
+                "slots": part["ticket"].slots,
+                "position": get_deployment_scheduler().get_position(part["ticket"].id),
+                "agents": [index for index, _ in part["members"]]
+            }
+            for part in parts
+        ]
+    }
+    return StreamingResponse(stream_batch_events(queued, events, len(parts)), media_type="application/x-ndjson")
+
+
+async def stream_batch_events(queued: dict, events: asyncio.Queue, part_count: int):
+    yield json.dumps(queued) + "\n"
+    deployed = failed = 0
+    while part_count:
+        event = await events.get()
+        if event is None:
+            part_count -= 1
+            continue
+        if event["event"] == "agent":
+            if event["status"] == "deployed":
+                deployed += 1
             else:
-                print(f"[DEBUG] Could not fetch artifacts: {resp.status_code} {resp.text}")
-            endpoint = download_deployed_url_artifact(repo, run_id, framework, agent_remote_path)
-            if endpoint:
-                break
-            time.sleep(retry_delay)
-        if not endpoint:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Deployment succeeded but artifact not found after {max_retries} retries. Check workflow artifact naming and logs."
-            )
+                failed += 1
+        yield json.dumps(event) + "\n"
+    yield json.dumps({"event": "completed", "deployed": deployed, "failed": failed}) + "\n"
+
+
+async def run_batch_part(ticket: DeploymentTicket, members: list, events: asyncio.Queue):
+    """
+    Waits for the part's slots, runs it in a worker thread and puts its events on `events`,
+    followed by None. Runs to the end even if the client stops reading.
+    """
+    agent_ids = {}
+    reported = set()
+    try:
+        async with get_deployment_scheduler().slot(ticket, timeout=DEPLOY_SLOT_TIMEOUT):
+            async for event in iterate_in_threadpool(deploy_batch_part(members, ticket.slots)):
+                if event["event"] == "accepted":
+                    agent_ids.update((agent["index"], agent["agent_id"]) for agent in event["agents"])
+                elif event["event"] == "agent":
+                    reported.add(event["index"])
+                await events.put(event)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to fetch deployed endpoint: {e}")
-    # 4. Update agent info
-    update_agent(agent_id, {"endpoint": endpoint, "status": "deployed", "commit_sha": commit_sha, "run_id": run_id})
-    agent_info = get_agent(agent_id)
-    if not agent_info:
-        raise HTTPException(status_code=404, detail="Agent not found after creation.")
-    return agent_info
+        print(f"[DEBUG] batch part {ticket.id} failed: {error_detail(e)}")
+        for index, _ in members:
+            if index in reported:
+                continue
+            if index in agent_ids:
+                await run_in_threadpool(update_agent, agent_ids[index], {"status": "failed", "error": error_detail(e)})
+            await events.put({"event": "agent", "index": index, "agent_id": agent_ids.get(index), "status": "failed", "endpoint": "", "error": error_detail(e)})
+    finally:
+        await events.put(None)
+
+
+def deploy_batch_part(members: list, max_parallel: int):
+    """
+    Renders, pushes and dispatches one user's agents ([(index, AgentCreateRequest)]) as a matrix
+    run of at most `max_parallel` parallel jobs, then yields its "accepted" and "agent" events.
+    Agents whose dispatch inputs would exceed GitHub's limit for one run go into further runs,
+    each dispatched once the previous one has finished.
+    """
+    entries = []
+    for index, agent_req in members:
+        tools = [tool.model_dump() for tool in agent_req.tools]
+        content_hash = compute_content_hash(agent_req.framework, agent_req.prompt, tools)
+        app_name = get_agent_id({"framework": agent_req.framework})
+        runtime_env = build_runtime_env(agent_req.credentials, agent_req.response_cache_ttl)
+        runtime_env["AGENT_NAME"] = app_name
+        entries.append({
+            "index": index,
+            "request": agent_req,
+            "tools": tools,
+            "content_hash": content_hash,
+            "artifact": get_artifact(content_hash),
+            "app_name": app_name,
+            "runtime_env": runtime_env
+        })
+    repo = os.environ.get("GITHUB_REPO")
+    ref = os.environ.get("GITHUB_REF", "main")
+
+    # Render every distinct new agent concurrently; identical agents in the batch share one render.
+    to_render = {}
+    for entry in entries:
+        if not entry["artifact"] and entry["content_hash"] not in to_render:
+            to_render[entry["content_hash"]] = entry
+    def render(entry):
+        agent_req = entry["request"]
+        code = render_agent_code(agent_req.framework, build_template_context(agent_req.prompt, entry["tools"]))
+        return save_agent_code(get_artifact_basename(agent_req.framework, entry["content_hash"]), code)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            code_paths = dict(zip(to_render, pool.map(render, to_render.values())))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Template rendering failed: {e}")
+
+    built = {}
+    for content_hash, code_path in code_paths.items():
+        framework = to_render[content_hash]["request"].framework
+        # commit_sha is filled in after the push; same length, so the inputs can be measured first
+        built[content_hash] = {"framework": framework, "agent_file": get_agent_remote_path(framework, code_path), "commit_sha": "0" * 40}
+
+    matrix = []
+    agent_env = {}
+    for entry in entries:
+        source = entry["artifact"] or built[entry["content_hash"]]
+        matrix.append({
+            "sha": source["commit_sha"],
+            "agent_file": source["agent_file"],
+            "framework": entry["request"].framework,
+            "app_name": entry["app_name"],
+            "content_hash": entry["content_hash"],
+            "skip_build": "true" if entry["artifact"] else "false"
+        })
+        agent_env[entry["app_name"]] = entry["runtime_env"]
+    try:
+        runs = split_batch_deploy(matrix, agent_env, max_parallel)
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    # Push all new bundles in a single commit
+    if code_paths:
+        files = {}
+        for content_hash, code_path in code_paths.items():
+            files.update(build_agent_bundle(code_path, built[content_hash]["framework"], agent_config={"content_hash": content_hash}))
+        try:
+            commit_sha = push_files_to_github(
+                files,
+                repo_url=os.environ.get("GITHUB_REPO_URL"),
+                branch=ref,
+                commit_message=f"Add/update {len(code_paths)} agents (batch)"
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to push agents to GitHub: {e}")
+        for record in built.values():
+            record["commit_sha"] = commit_sha
+        for agent in matrix:
+            if agent["skip_build"] == "false":
+                agent["sha"] = commit_sha
+
+    by_app_name = {entry["app_name"]: entry for entry in entries}
+    for entry, agent in zip(entries, matrix):
+        entry["commit_sha"] = agent["sha"]
+    for run_number, run in enumerate(runs):
+        try:
+            correlation_id, dispatched_at = dispatch_batch_deploy(
+                repo, ref, run, {agent["app_name"]: agent_env[agent["app_name"]] for agent in run}, max_parallel
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to trigger batch deploy workflow: {e}")
+        if run_number == 0:
+            for content_hash, record in built.items():
+                record_artifact(content_hash, record)
+        run_entries = [by_app_name[agent["app_name"]] for agent in run]
+        for entry in run_entries:
+            agent_req = entry["request"]
+            entry["agent_id"] = register_agent({
+                "user_id": agent_req.user_id,
+                "status": "deploying",
+                "endpoint": "",
+                "tools": agent_req.tools,
+                "framework": agent_req.framework,
+                "prompt": agent_req.prompt,
+                "app_name": entry["app_name"],
+                "content_hash": entry["content_hash"]
+            })
+        yield {
+            "event": "accepted",
+            "correlation_id": correlation_id,
+            "agents": [{"index": e["index"], "agent_id": e["agent_id"], "app_name": e["app_name"]} for e in run_entries]
+        }
+        for result in iter_batch_deploy_results(repo, ref, correlation_id, dispatched_at, run):
+            entry = by_app_name[result["app_name"]]
+            update_agent(entry["agent_id"], {
+                "endpoint": result["endpoint"],
+                "status": result["status"],
+                "commit_sha": entry["commit_sha"]
+            })
+            yield dict(result, event="agent", index=entry["index"], agent_id=entry["agent_id"])
+
+@router.get("/deployments/queue")
+def get_deployment_queue(user_id: Optional[int] = None):
+    """Running and queued deployments (optionally for one user) with their queue positions."""
+    return get_deployment_scheduler().get_status(user_id)
+
+@router.get("/deployments/queue/{ticket_id}")
+def get_deployment_queue_position(ticket_id: str):
+    position = get_deployment_scheduler().get_position(ticket_id)
+    if position is None:
+        raise HTTPException(status_code=404, detail="Deployment not queued or running")
+    return {"ticket_id": ticket_id, "position": position, "state": "running" if position == 0 else "queued"}
 
 @router.get("/agents/{agent_id}", response_model=AgentInfo)
 def get_agent_info(agent_id: str):
@@ -147,7 +475,9 @@ def get_agent_info(agent_id: str):
         raise HTTPException(status_code=404, detail="Agent not found")
     return agent
 
-@router.get("/agents")
-def list_agents():
-    """Return all registered agents (for UI listing)."""
+@router.get("/agents", response_class=FastJSONResponse)
+def list_agents(user_id: Optional[int] = None):
+    """Return registered agents, optionally only those of one user (for UI listing)."""
+    if user_id is not None:
+        return get_agents_by_user(user_id)
     return get_all_agents()
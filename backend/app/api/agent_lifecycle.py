@@ -1,8 +1,23 @@
-from fastapi import APIRouter, HTTPException
-from app.services.agent_registry import get_agent
+from typing import List
+import httpx
+from anyio import from_thread
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from app.services.agents_studio.agent_registry import get_agent, update_agent, mark_agents_deleted
+from app.services.agents_studio.deployers import get_deployer
+from app.services.agents_studio.status_cache import get_status_cache, STATUS_RETRY_AFTER
+from app.services.agents_studio.azure_status import extract_containerapp_name
+from app.services.agents_studio.agent_proxy import proxy_request, get_circuit_states, forget_agents, CircuitOpenError
 
 router = APIRouter()
 
+class ContainerStatusRequest(BaseModel):
+    agent_ids: List[str]
+
+class ContainerDeleteRequest(BaseModel):
+    urls_or_names: List[str]
+
 @router.get("/agents/{agent_id}/status")
 def get_agent_status(agent_id: str):
     agent = get_agent(agent_id)
@@ -10,6 +25,44 @@ def get_agent_status(agent_id: str):
         raise HTTPException(status_code=404, detail="Agent not found")
     return {"status": agent.get("status", "unknown")}
 
+@router.get("/agents/{agent_id}/container_status")
+def get_agent_container_status(agent_id: str):
+    """Azure Container App status of the agent, served from the status cache without waiting for a check."""
+    agent = get_agent(agent_id)
+    if not agent:
+        raise HTTPException(status_code=404, detail="Agent not found")
+    rich_status = get_status_cache().get(agent.get("app_name") or agent["endpoint"])
+    if rich_status is None:
+        raise HTTPException(status_code=503, detail="Container status is being checked, retry shortly", headers={"Retry-After": str(STATUS_RETRY_AFTER)})
+    return rich_status
+
+@router.post("/agents/container_status")
+def get_agents_container_status(body: ContainerStatusRequest):
+    """Container App status of many agents; uncached apps are checked together in one workflow run."""
+    agents = {agent_id: get_agent(agent_id) for agent_id in body.agent_ids}
+    names = {agent_id: agent.get("app_name") or agent["endpoint"] for agent_id, agent in agents.items() if agent}
+    statuses = get_status_cache().get_many(names.values())
+    return {
+        agent_id: statuses.get(extract_containerapp_name(names[agent_id])) if agent_id in names else None
+        for agent_id in body.agent_ids
+    }
+
+@router.post("/container_apps:delete")
+def delete_container_apps(body: ContainerDeleteRequest):
+    """
+    Deletes many Container Apps in one workflow run and soft deletes their agents in one DB update.
+    Returns {app_name: {"result": "success"|"not_found"|"failure", "log": ...}}.
+    """
+    names = list(dict.fromkeys(extract_containerapp_name(n) for n in body.urls_or_names))
+    if not names:
+        raise HTTPException(status_code=400, detail="No container apps given")
+    results = get_deployer("azure").delete_many(names)
+    deleted = [name for name, r in results.items() if r["result"] in ("success", "not_found")]
+    agent_ids = mark_agents_deleted(deleted)
+    # The breakers are only touched from the event loop
+    from_thread.run_sync(forget_agents, agent_ids)
+    return {"results": results, "deleted_agent_ids": agent_ids}
+
 @router.get("/agents/{agent_id}/endpoint")
 def get_agent_endpoint(agent_id: str):
     agent = get_agent(agent_id)
@@ -18,12 +71,43 @@ def get_agent_endpoint(agent_id: str):
     return {"endpoint": agent.get("endpoint", "")}
 
 @router.post("/agents/{agent_id}/query")
-def query_agent(agent_id: str, body: dict):
-    agent = get_agent(agent_id)
+async def query_agent(agent_id: str, request: Request):
+    """
+    Proxies the request body to the agent's POST /chat and streams its response back as-is.
+    """
+    return await forward_to_agent(agent_id, "/chat", request)
+
+@router.post("/agents/{agent_id}/query/stream")
+async def query_agent_stream(agent_id: str, request: Request):
+    """
+    Proxies the request body to the agent's POST /chat/stream; its SSE events (token, tool_call,
+    tool_result, done, error) are passed on as they arrive.
+    """
+    return await forward_to_agent(agent_id, "/chat/stream", request)
+
+async def forward_to_agent(agent_id: str, path: str, request: Request):
+    agent = await run_in_threadpool(get_agent, agent_id)
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
-    # Placeholder: In production, proxy this query to the running agent
-    return {"result": f"Query received for agent {agent_id} (not yet implemented)"}
+    if not agent.get("endpoint"):
+        raise HTTPException(status_code=409, detail=f"Agent has no endpoint (status: {agent.get('status')})")
+    if agent.get("status") == "preview":
+        get_deployer("local").touch(agent["app_name"])
+    try:
+        return await proxy_request(
+            agent_id, agent["endpoint"], path, "POST", await request.body(), dict(request.headers), params=request.query_params
+        )
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except httpx.TimeoutException:
+        raise HTTPException(status_code=504, detail="Agent did not respond in time")
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"Agent unreachable: {e.__class__.__name__}")
+
+@router.get("/agents/proxy/circuits")
+def get_agent_circuits():
+    """Circuit breaker state of every agent the proxy has talked to."""
+    return get_circuit_states()
 
 @router.get("/agents/{agent_id}/tools")
 def get_agent_tools(agent_id: str):
@@ -31,3 +115,19 @@ def get_agent_tools(agent_id: str):
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     return {"tools": agent.get("tools", [])}
+
+@router.get("/agents/{agent_id}/preview")
+def get_agent_preview(agent_id: str):
+    agent = get_agent(agent_id)
+    if not agent:
+        raise HTTPException(status_code=404, detail="Agent not found")
+    return get_deployer("local").status(agent["app_name"])
+
+@router.delete("/agents/{agent_id}/preview")
+def stop_agent_preview(agent_id: str):
+    agent = get_agent(agent_id)
+    if not agent:
+        raise HTTPException(status_code=404, detail="Agent not found")
+    stopped = get_deployer("local").delete(agent["app_name"])
+    update_agent(agent_id, {"status": "stopped", "endpoint": ""})
+    return {"stopped": stopped}
@@ -1,4 +1,4 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 app = FastAPI()
@@ -12,8 +12,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-from app.services.tool_registry import get_tools as get_tools_registry
-from app.services.framework_registry import get_frameworks as get_frameworks_registry, get_framework_creds_schema
+from app.services.agents_studio.tool_registry import get_tools as get_tools_registry
+from app.services.agents_studio.framework_registry import get_frameworks as get_frameworks_registry, get_framework_creds_schema_json
+from app.services.agents_studio.catalog_cache import precomputed_responses, cached_json_response
 from fastapi import APIRouter
 from app.api import agent as agent_router
 from app.api import agent_lifecycle as agent_lifecycle_router
@@ -21,17 +22,27 @@ from app.api import agent_lifecycle as agent_lifecycle_router
 app.include_router(agent_router.router, prefix="/api")
 app.include_router(agent_lifecycle_router.router, prefix="/api")
 
+@app.on_event("shutdown")
+async def close_agent_proxy():
+    from app.services.agents_studio.agent_proxy import close_http_client
+    await close_http_client()
+
 @app.get("/tools")
-def get_tools():
-    return {"tools": get_tools_registry()}
+def get_tools(request: Request):
+    # The tool registry is static for the lifetime of the process
+    body, etag = precomputed_responses.get("tools", 0, lambda: {"tools": get_tools_registry()})
+    return cached_json_response(request, body, etag)
 
 @app.get("/frameworks")
-def get_frameworks():
-    return {"frameworks": get_frameworks_registry()}
+def get_frameworks(request: Request):
+    # FRAMEWORKS is static for the lifetime of the process
+    body, etag = precomputed_responses.get("frameworks", 0, lambda: {"frameworks": get_frameworks_registry()})
+    return cached_json_response(request, body, etag)
 
 @app.get("/creds_schema/{framework_name}")
-def get_creds_schema(framework_name: str):
-    return get_framework_creds_schema(framework_name)
+def get_creds_schema(framework_name: str, request: Request):
+    body, etag = get_framework_creds_schema_json(framework_name)
+    return cached_json_response(request, body, etag)
 
 if __name__ == "__main__":
     import uvicorn
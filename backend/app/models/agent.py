@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Literal
 ######## add told_id
 class MCPServerConfig(BaseModel):
     name: str
@@ -11,6 +11,13 @@ class AgentCreateRequest(BaseModel):
     prompt: str
     framework: str
     credentials: Dict[str, Any]
+    user_id: Optional[int] = None
+    deploy_target: Literal["azure", "local"] = "azure"
+    # Seconds the agent may serve cached answers to repeated queries without history; 0/None disables it
+    response_cache_ttl: Optional[float] = None
+
+class AgentBatchCreateRequest(BaseModel):
+    agents: List[AgentCreateRequest]
 
 class AgentInfo(BaseModel):
     id: str
@@ -19,3 +26,12 @@ class AgentInfo(BaseModel):
     tools: List[MCPServerConfig]
     framework: str
     prompt: str
+
+class AgentQueuedInfo(BaseModel):
+    """Returned with 202 when an Azure deployment has been queued; poll /agents/{id} for its status."""
+    id: str
+    app_name: str
+    ticket_id: str
+    # 0 while running, 1.. while queued, None once done
+    position: Optional[int] = None
+    state: Literal["queued"] = "queued"
@@ -1,4 +1,5 @@
 import os
+import hashlib
 import jinja2
 import tempfile
 from typing import Dict, Any
@@ -13,6 +14,8 @@ TEMPLATE_PATHS = {
 }
 
 AGENTS_TEMPLATES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../agents_templates'))
+# Runtime blocks shared by all templates, pulled in with {% include %}
+RUNTIME_PARTIALS_DIR = "_runtime"
 
 def render_agent_code(framework: str, context: Dict[str, Any]) -> str:
     env = jinja2.Environment(
@@ -25,6 +28,22 @@ def render_agent_code(framework: str, context: Dict[str, Any]) -> str:
     template = env.get_template(template_path)
     return template.render(**context)
 
+def template_fingerprint(framework: str) -> str:
+    """
+    sha256 of everything besides the inputs that ends up in a framework's bundle: the template
+    source, the shared _runtime partials it includes and its requirements.txt. Part of the
+    content hash, so changing any of them gives new artifacts instead of redeploying the old image.
+    """
+    template_path = TEMPLATE_PATHS.get(framework)
+    if not template_path:
+        raise ValueError(f"Unsupported framework: {framework}")
+    partials = sorted(os.path.join(RUNTIME_PARTIALS_DIR, name) for name in os.listdir(os.path.join(AGENTS_TEMPLATES_DIR, RUNTIME_PARTIALS_DIR)))
+    digest = hashlib.sha256()
+    for path in [template_path, *partials, os.path.join(os.path.dirname(template_path), "requirements.txt")]:
+        with open(os.path.join(AGENTS_TEMPLATES_DIR, path), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
 def save_agent_code(agent_id: str, code: str) -> str:
     agents_code_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../generated_agents'))
     os.makedirs(agents_code_dir, exist_ok=True)
@@ -40,6 +59,14 @@ def get_agent_id(agent_info: dict) -> str:
     final_agent_id = framework_id + "-" + agent_id
     return final_agent_id[:25]
 
+def get_artifact_basename(framework: str, content_hash: str) -> str:
+    """
+    Name of the rendered agent file for a content hash. Identical template inputs
+    always map to the same file, so the pushed code and built image can be reused.
+    """
+    framework_id = framework.replace('_', '-')
+    return f"{framework_id}-{content_hash[:16]}"
+
 if __name__ == "__main__":
     # Simulate rendering and saving agent code for agno
     import uuid
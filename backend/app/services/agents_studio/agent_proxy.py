@@ -0,0 +1,170 @@
+"""
+Module: agent_proxy.py
+Async reverse proxy from the backend to deployed agent containers.
+
+- One shared httpx.AsyncClient: connections are pooled per host and kept alive, so
+  repeated queries to the same agent skip the TCP/TLS handshake.
+- A circuit breaker per agent: after PROXY_FAILURE_THRESHOLD consecutive failures
+  (connection errors, timeouts, 502/503/504) requests fail fast for
+  PROXY_RESET_TIMEOUT seconds, then a single trial request decides whether it closes.
+  Breakers of deleted agents are dropped, and at most PROXY_MAX_BREAKERS are kept (LRU).
+- Response bodies are streamed back chunk by chunk without buffering, so SSE responses
+  (the agents' /chat/stream) reach the caller event by event.
+- Only the request headers in FORWARDED_REQUEST_HEADERS reach the agent; the caller's
+  credentials (Authorization, Cookie, ...) stay in the backend.
+"""
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+import httpx
+from starlette.background import BackgroundTask
+from starlette.responses import StreamingResponse
+
+PROXY_CONNECT_TIMEOUT = float(os.environ.get("PROXY_CONNECT_TIMEOUT", "5"))
+PROXY_READ_TIMEOUT = float(os.environ.get("PROXY_READ_TIMEOUT", "120"))
+PROXY_MAX_CONNECTIONS = int(os.environ.get("PROXY_MAX_CONNECTIONS", "200"))
+PROXY_MAX_KEEPALIVE = int(os.environ.get("PROXY_MAX_KEEPALIVE", "50"))
+PROXY_KEEPALIVE_EXPIRY = float(os.environ.get("PROXY_KEEPALIVE_EXPIRY", "60"))
+PROXY_FAILURE_THRESHOLD = int(os.environ.get("PROXY_FAILURE_THRESHOLD", "5"))
+PROXY_RESET_TIMEOUT = float(os.environ.get("PROXY_RESET_TIMEOUT", "30"))
+PROXY_MAX_BREAKERS = int(os.environ.get("PROXY_MAX_BREAKERS", "1000"))
+
+# Status codes meaning the container (not the request) is unhealthy
+UNHEALTHY_STATUS_CODES = {502, 503, 504}
+# Request headers passed on to the agent
+FORWARDED_REQUEST_HEADERS = {
+    "accept", "accept-encoding", "accept-language", "content-type", "user-agent",
+    "last-event-id", "x-request-id", "x-request-priority"
+}
+# Hop-by-hop headers (RFC 7230 6.1) plus ones httpx/starlette set themselves
+EXCLUDED_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te", "trailer",
+    "transfer-encoding", "upgrade", "host", "content-length"
+}
+
+
+class CircuitOpenError(RuntimeError):
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """closed -> open after `failure_threshold` consecutive failures -> half_open after `reset_timeout`."""
+
+    def __init__(self, failure_threshold: int = PROXY_FAILURE_THRESHOLD, reset_timeout: float = PROXY_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.time() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_request(self):
+        state = self.state
+        if state == "open" or (state == "half_open" and self.trial_in_flight):
+            retry_after = max(1, int(self.opened_at + self.reset_timeout - time.time()))
+            raise CircuitOpenError("Agent is unavailable (circuit open)", retry_after)
+        if state == "half_open":
+            self.trial_in_flight = True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.time()
+
+    def to_dict(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self.failures}
+
+
+_client: Optional[httpx.AsyncClient] = None
+# Only touched from the event loop, so no lock is needed.
+_breakers: "OrderedDict[str, CircuitBreaker]" = OrderedDict()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(PROXY_READ_TIMEOUT, connect=PROXY_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=PROXY_MAX_CONNECTIONS,
+                max_keepalive_connections=PROXY_MAX_KEEPALIVE,
+                keepalive_expiry=PROXY_KEEPALIVE_EXPIRY
+            ),
+            follow_redirects=False
+        )
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_breaker(agent_id: str) -> CircuitBreaker:
+    breaker = _breakers.get(agent_id)
+    if breaker is None:
+        breaker = _breakers[agent_id] = CircuitBreaker()
+        while len(_breakers) > PROXY_MAX_BREAKERS:
+            _breakers.popitem(last=False)
+    else:
+        _breakers.move_to_end(agent_id)
+    return breaker
+
+
+def forget_agents(agent_ids: Iterable[str]):
+    """Drops the breakers of deleted agents."""
+    for agent_id in agent_ids:
+        _breakers.pop(agent_id, None)
+
+
+def get_circuit_states() -> Dict[str, dict]:
+    return {agent_id: breaker.to_dict() for agent_id, breaker in _breakers.items()}
+
+
+async def proxy_request(agent_id: str, endpoint: str, path: str, method: str, body: bytes, headers: dict, params=None) -> StreamingResponse:
+    """
+    Forwards one request to `endpoint` + `path` and streams the agent's response back.
+    Raises CircuitOpenError when the agent's circuit is open and httpx.HTTPError when the agent is unreachable.
+    """
+    client = get_http_client()
+    forward_headers = {k: v for k, v in headers.items() if k.lower() in FORWARDED_REQUEST_HEADERS}
+    request = client.build_request(method, f"{endpoint.rstrip('/')}/{path.lstrip('/')}", content=body, headers=forward_headers, params=params)
+    breaker = get_breaker(agent_id)
+    breaker.before_request()
+    try:
+        response = await client.send(request, stream=True)
+    except httpx.HTTPError:
+        breaker.record_failure()
+        raise
+    finally:
+        # Also on cancellation or any other error, so a later request can be the next trial.
+        breaker.trial_in_flight = False
+    if response.status_code in UNHEALTHY_STATUS_CODES:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    response_headers = {k: v for k, v in response.headers.items() if k.lower() not in EXCLUDED_HEADERS}
+    return StreamingResponse(
+        response.aiter_raw(),
+        status_code=response.status_code,
+        headers=response_headers,
+        background=BackgroundTask(response.aclose)
+    )
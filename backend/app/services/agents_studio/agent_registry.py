@@ -1,24 +1,139 @@
+"""
+Module: agent_registry.py
+Registry of created agents, persisted in the agents_deployed table.
+
+Reads go through a bounded in-process LRU cache. Entries are invalidated on every
+write from this process and expire after AGENT_CACHE_TTL seconds, so other uvicorn
+workers/replicas see each other's updates within that window.
+"""
+import os
+import json
+import time
 import uuid
-from typing import Dict
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from app.services.database import database
+
+AGENT_CACHE_SIZE = int(os.environ.get("AGENT_CACHE_SIZE", "1024"))
+AGENT_CACHE_TTL = float(os.environ.get("AGENT_CACHE_TTL", "30"))
+
+# Registry field -> agents_deployed column
+FIELD_COLUMNS = {
+    "id": "agent_id",
+    "user_id": "user_id",
+    "endpoint": "deployed_agent_url",
+    "prompt": "system_prompt",
+    "tools": "mcp_servers",
+    "status": "status",
+    "framework": "framework",
+    "commit_sha": "sha",
+    "run_id": "run_id",
+    "app_name": "app_name",
+    "content_hash": "content_hash",
+    "error": "error"
+}
+
+_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _to_columns(agent_info: dict) -> dict:
+    row = {}
+    for field, value in agent_info.items():
+        column = FIELD_COLUMNS.get(field)
+        if column is None:
+            continue
+        if field == "tools":
+            value = [t.model_dump() if hasattr(t, "model_dump") else t for t in value or []]
+        elif field == "run_id" and value is not None:
+            value = str(value)
+        row[column] = value
+    return row
+
+
+def _from_row(row: dict) -> dict:
+    agent = {field: row.get(column) for field, column in FIELD_COLUMNS.items()}
+    tools = agent.get("tools")
+    agent["tools"] = json.loads(tools) if isinstance(tools, str) and tools else (tools or [])
+    agent["endpoint"] = agent.get("endpoint") or ""
+    return agent
+
+
+def _cache_get(agent_id: str) -> Optional[dict]:
+    with _cache_lock:
+        entry = _cache.get(agent_id)
+        if entry is None:
+            return None
+        agent, expires = entry
+        if expires < time.time():
+            del _cache[agent_id]
+            return None
+        _cache.move_to_end(agent_id)
+        return dict(agent)
+
+
+def _cache_put(agent_id: str, agent: dict):
+    with _cache_lock:
+        _cache[agent_id] = (dict(agent), time.time() + AGENT_CACHE_TTL)
+        _cache.move_to_end(agent_id)
+        while len(_cache) > AGENT_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def invalidate_agent(agent_id: str):
+    with _cache_lock:
+        _cache.pop(agent_id, None)
 
-# In-memory agent registry (can be replaced with DB later)
-agents: Dict[str, dict] = {}
 
 def register_agent(agent_info: dict) -> str:
-    agent_id = str(uuid.uuid4())
-    agent_info['id'] = agent_id
-    agents[agent_id] = agent_info
+    """
+    Persists a new agent and returns its id (the same id get_agent/update_agent take).
+    """
     framework_id = agent_info['framework'].replace('_', '-')
-    final_agent_id = framework_id + "-" + agent_id
-    return final_agent_id[:25]
+    agent_id = f"{framework_id}-{uuid.uuid4()}"
+    agent_info['id'] = agent_id
+    row = _to_columns(agent_info)
+    row.setdefault("deployed_agent_url", "")
+    database.insert_agent_deployed(row)
+    return agent_id
+
+
+def get_agent(agent_id: str) -> Optional[dict]:
+    agent = _cache_get(agent_id)
+    if agent is not None:
+        return agent
+    row = database.fetch_deployed_agent_by_id(agent_id)
+    if row is None:
+        return None
+    agent = _from_row(row)
+    _cache_put(agent_id, agent)
+    return dict(agent)
 
-def get_agent(agent_id: str) -> dict:
-    return agents.get(agent_id)
 
 def update_agent(agent_id: str, updates: dict):
-    if agent_id in agents:
-        agents[agent_id].update(updates)
+    row = _to_columns(updates)
+    row.pop("agent_id", None)
+    database.update_agent_deployed_by_id(agent_id, row)
+    invalidate_agent(agent_id)
+
+
+def mark_agents_deleted(app_names: List[str]) -> List[str]:
+    """
+    Soft deletes every agent running on one of the given container apps in a single DB round trip.
+    Returns the affected agent ids.
+    """
+    if not app_names:
+        return []
+    agent_ids = database.soft_delete_agents_deployed_by_app_name(list(app_names))
+    for agent_id in agent_ids:
+        invalidate_agent(agent_id)
+    return agent_ids
+
+
+def get_agents_by_user(user_id: int) -> List[dict]:
+    return [_from_row(row) for row in database.fetch_deployed_agents_by_user(user_id)]
 
 
-def get_all_agents():
-    return list(agents.values())
+def get_all_agents() -> List[dict]:
+    return [_from_row(row) for row in database.fetch_deployed_agents_by_user(None)]
@@ -0,0 +1,171 @@
+"""
+Module: artifact_store.py
+Content-addressed index of rendered agent artifacts.
+
+Generated agents only differ by framework, system prompt and MCP tool set; LLM
+credentials and names are injected into the container at runtime. Hashing the
+normalized template inputs (with a fingerprint of the template and its
+requirements) lets identical agents reuse the commit and image of an earlier
+deployment instead of pushing and building again.
+"""
+import os
+import json
+import base64
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional
+from cryptography.hazmat.primitives import padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from app.services.agents_studio.agent_creator import template_fingerprint
+
+# Credential keys that are passed to the container as environment variables
+# and must never end up in the rendered code or in the content hash.
+RUNTIME_SECRET_KEYS = [
+    "AZURE_OPENAI_API_KEY",
+    "AZURE_OPENAI_ENDPOINT",
+    "AZURE_OPENAI_API_VERSION",
+    "AZURE_OPENAI_DEPLOYMENT",
+    # Optional JSON list of extra deployments the agent load balances across
+    "AZURE_OPENAI_DEPLOYMENTS",
+]
+
+# Aliases accepted from the openai_agents credential schema.
+RUNTIME_SECRET_ALIASES = {
+    "OPENAI_API_KEY": "AZURE_OPENAI_API_KEY",
+    "OPENAI_API_BASE": "AZURE_OPENAI_ENDPOINT",
+    "OPENAI_API_VERSION": "AZURE_OPENAI_API_VERSION",
+    "OPENAI_DEPLOYMENT_NAME": "AZURE_OPENAI_DEPLOYMENT",
+}
+
+# Runtime secrets travel to the deploy workflows encrypted with this passphrase, which is also
+# stored as the AGENT_ENV_KEY repository secret; workflow inputs are visible to anyone who can
+# read the run, so they must never carry the plain values.
+AGENT_ENV_KEY_VAR = "AGENT_ENV_KEY"
+AGENT_ENV_KDF_ITERATIONS = 100000
+
+ARTIFACT_INDEX_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data", "artifacts", "index.json"))
+
+_lock = threading.Lock()
+_index: Optional[Dict[str, dict]] = None
+
+
+def build_runtime_env(credentials: Dict[str, Any], response_cache_ttl: Optional[float] = None) -> Dict[str, str]:
+    """
+    Map user supplied credentials (and per-agent runtime settings) to the environment variables read by the generated agent.
+    """
+    env = {}
+    for key, value in credentials.items():
+        target = RUNTIME_SECRET_ALIASES.get(key, key)
+        if target in RUNTIME_SECRET_KEYS and value:
+            env.setdefault(target, value if isinstance(value, str) else json.dumps(value))
+    if response_cache_ttl:
+        env["RESPONSE_CACHE_TTL"] = str(response_cache_ttl)
+    return env
+
+
+def seal_runtime_env(env: Dict[str, Any]) -> str:
+    """
+    Encrypts runtime secrets for a deploy workflow input. The result is what
+    `openssl enc -d -aes-256-cbc -pbkdf2 -iter 100000 -md sha256 -a -A -pass env:AGENT_ENV_KEY`
+    decrypts back to the JSON of `env`, so the runner needs nothing beyond openssl.
+    """
+    passphrase = os.environ.get(AGENT_ENV_KEY_VAR)
+    if not passphrase:
+        raise RuntimeError(f"{AGENT_ENV_KEY_VAR} is not set; runtime secrets cannot be sent to the deploy workflow")
+    salt = os.urandom(8)
+    derived = hashlib.pbkdf2_hmac("sha256", passphrase.encode("utf-8"), salt, AGENT_ENV_KDF_ITERATIONS, dklen=48)
+    padder = padding.PKCS7(algorithms.AES.block_size).padder()
+    plaintext = padder.update(json.dumps(env).encode("utf-8")) + padder.finalize()
+    encryptor = Cipher(algorithms.AES(derived[:32]), modes.CBC(derived[32:])).encryptor()
+    ciphertext = encryptor.update(plaintext) + encryptor.finalize()
+    return base64.b64encode(b"Salted__" + salt + ciphertext).decode("ascii")
+
+
+def normalize_template_inputs(framework: str, prompt: str, tools: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Reduce the template inputs to the fields that affect the rendered code, in a stable order.
+    Whitespace around the prompt is ignored and tools are sorted by name and url.
+    """
+    normalized_tools = sorted(
+        (
+            {
+                "name": (tool.get("name") or "").strip(),
+                "url": (tool.get("url") or "").strip(),
+                "transport": (tool.get("transport") or "").strip().lower(),
+            }
+            for tool in tools
+        ),
+        key=lambda t: (t["name"], t["url"], t["transport"]),
+    )
+    return {
+        "framework": framework,
+        "system_message": (prompt or "").strip(),
+        "mcp_servers": normalized_tools,
+    }
+
+
+def compute_content_hash(framework: str, prompt: str, tools: List[Dict[str, Any]]) -> str:
+    """
+    Returns the sha256 hex digest of the normalized template inputs and the template itself.
+    """
+    normalized = normalize_template_inputs(framework, prompt, tools)
+    normalized["template"] = template_fingerprint(framework)
+    payload = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def sealed_env_length(env: Dict[str, Any]) -> int:
+    """Length of seal_runtime_env(env), computed without the (deliberately slow) key derivation."""
+    padded = (len(json.dumps(env).encode("utf-8")) // 16 + 1) * 16
+    return 4 * -(-(len(b"Salted__") + 8 + padded) // 3)
+
+
+def _load_index() -> Dict[str, dict]:
+    global _index
+    if _index is None:
+        try:
+            with open(ARTIFACT_INDEX_PATH, "r", encoding="utf-8") as f:
+                _index = json.load(f)
+        except FileNotFoundError:
+            _index = {}
+        except Exception as e:
+            print(f"[artifact_store] Failed to load artifact index at {ARTIFACT_INDEX_PATH}: {e}")
+            _index = {}
+    return _index
+
+
+def _save_index(index: Dict[str, dict]):
+    os.makedirs(os.path.dirname(ARTIFACT_INDEX_PATH), exist_ok=True)
+    tmp_path = ARTIFACT_INDEX_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, ARTIFACT_INDEX_PATH)
+
+
+def get_artifact(content_hash: str) -> Optional[dict]:
+    """
+    Returns the recorded artifact ({commit_sha, agent_file, framework, ...}) for a content hash, if any.
+    """
+    with _lock:
+        artifact = _load_index().get(content_hash)
+        return dict(artifact) if artifact else None
+
+
+def record_artifact(content_hash: str, artifact: dict):
+    """
+    Records the commit/image produced for a content hash so later identical requests can reuse it.
+    """
+    with _lock:
+        index = _load_index()
+        index[content_hash] = dict(index.get(content_hash, {}), **artifact)
+        _save_index(index)
+
+
+def forget_artifact(content_hash: str):
+    """
+    Drops a content hash from the index, e.g. after its image was removed from the registry.
+    """
+    with _lock:
+        index = _load_index()
+        if index.pop(content_hash, None) is not None:
+            _save_index(index)
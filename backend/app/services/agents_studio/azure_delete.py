@@ -1,8 +1,10 @@
 import os
-import time
-import requests
 import re
+import json
 from dotenv import load_dotenv
+from app.services.agents_studio.github_client import get_github_client
+from app.services.agents_studio.github_artifacts import read_artifact_file
+from app.services.agents_studio.github_workflows import run_workflow
 load_dotenv()
 
 def extract_containerapp_name(url_or_name):
@@ -15,67 +17,22 @@ def extract_containerapp_name(url_or_name):
     return url_or_name
 
 
-def poll_workflow_run(repo, workflow_file, ref, token, poll_interval=10, timeout=600):
+def trigger_github_workflow(repo, workflow_file, ref, inputs, github_token):
     """
-    Polls for the latest completed workflow run for the given workflow file, branch, and event.
-    Returns the run_id of the completed run, or raises TimeoutError.
+    Dispatches the workflow and waits for the run it created. Returns (run_id, conclusion).
     """
-    url = f"https://api.github.com/repos/{repo}/actions/workflows/{workflow_file}/runs"
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept": "application/vnd.github+json"
-    }
-    start_time = time.time()
-    while True:
-        resp = requests.get(url, headers=headers, params={"branch": ref, "event": "workflow_dispatch"})
-        resp.raise_for_status()
-        runs = resp.json().get("workflow_runs", [])
-        if runs:
-            latest_run = runs[0]
-            run_id = latest_run["id"]
-            status = latest_run["status"]
-            conclusion = latest_run.get("conclusion")
-            print(f"Workflow run status: {status} (conclusion: {conclusion})")
-            if status == "completed":
-                return run_id, conclusion
-        if time.time() - start_time > timeout:
-            raise TimeoutError("Timed out waiting for workflow to complete.")
-        time.sleep(poll_interval)
-
-def trigger_github_workflow(repo, workflow_file, ref, inputs, github_token):
-    url = f"https://api.github.com/repos/{repo}/actions/workflows/{workflow_file}/dispatches"
-    headers = {
-        "Authorization": f"token {github_token}",
-        "Accept": "application/vnd.github+json"
-    }
-    data = {"ref": ref, "inputs": inputs}
-    response = requests.post(url, headers=headers, json=data)
-    if response.status_code != 204:
-        raise Exception(f"Failed to trigger workflow: {response.status_code}, {response.text}")
-    print("Workflow triggered successfully.")
-    # Now, poll for the workflow run
-    return poll_workflow_run(repo, workflow_file, ref, github_token)
-
+    client = get_github_client(token=github_token)
+    return run_workflow(client, repo, workflow_file, ref, inputs)
 
 
-def download_artifact(repo, run_id, artifact_name, github_token, save_dir="."):
-    headers = {"Authorization": f"token {github_token}", "Accept": "application/vnd.github+json"}
-    url_artifacts = f"https://api.github.com/repos/{repo}/actions/runs/{run_id}/artifacts"
-    resp = requests.get(url_artifacts, headers=headers)
-    artifacts = resp.json().get("artifacts", [])
-    artifact = next((a for a in artifacts if a["name"] == artifact_name), None)
-    if not artifact:
-        print(f"Artifact {artifact_name} not found.")
-        return None
-    download_url = artifact["archive_download_url"]
-    resp = requests.get(download_url, headers=headers)
-    zip_path = os.path.join(save_dir, f"{artifact_name}.zip")
-    with open(zip_path, "wb") as f:
-        f.write(resp.content)
-    import zipfile
-    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-        zip_ref.extractall(save_dir)
-    return save_dir
+def download_artifact(repo, run_id, artifact_name, github_token, member, wait_timeout=60):
+    """
+    Reads one file of a run's artifact in memory, waiting up to `wait_timeout` seconds for the
+    artifact to appear. Returns its text, or None if it is missing.
+    """
+    client = get_github_client(token=github_token)
+    content = read_artifact_file(client, repo, run_id, artifact_name, member, wait_timeout=wait_timeout)
+    return content.decode("utf-8") if content is not None else None
 
 
 def delete_container_app_via_github(
@@ -85,8 +42,7 @@ def delete_container_app_via_github(
     resource_group,
     subscription_id,
     ref="main",
-    workflow_file="agent-delete.yml",
-    save_dir="."
+    workflow_file="agent-delete.yml"
 ):
     app_name = extract_containerapp_name(url_or_name)
     inputs = {
@@ -96,21 +52,52 @@ def delete_container_app_via_github(
     }
     run_id, conclusion = trigger_github_workflow(repo, workflow_file, ref, inputs, github_token)
     print(f"Workflow run ID: {run_id}")
-    time.sleep(70)
     result_artifact = f"delete-result-{app_name}"
     log_artifact = f"delete-log-{app_name}"
-    download_artifact(repo, run_id, result_artifact, github_token, save_dir)
-    download_artifact(repo, run_id, log_artifact, github_token, save_dir)
     # Read result.txt for outcome
-    result_file = os.path.join(save_dir, "result.txt")
-    if os.path.exists(result_file):
-        with open(result_file, "r") as f:
-            result = f.read().strip()
+    result = download_artifact(repo, run_id, result_artifact, github_token, "result.txt")
+    if result is not None:
+        result = result.strip()
         print(f"Delete result: {result}")
+        if result != "success":
+            log = download_artifact(repo, run_id, log_artifact, github_token, "delete_log.txt")
+            if log:
+                print(log)
         return result == "success"
     print("No result.txt found. Deletion status unknown.")
     return False
 
+def delete_container_apps_via_github(
+    repo,
+    github_token,
+    urls_or_names,
+    resource_group,
+    subscription_id,
+    ref="main",
+    workflow_file="agent-delete.yml"
+):
+    """
+    Deletes many Container Apps in parallel within a single workflow run.
+    Returns {app_name: {"result": "success"|"not_found"|"failure", "log": ...}}; apps missing from the
+    results artifact are reported as failures.
+    """
+    names = [extract_containerapp_name(n) for n in urls_or_names]
+    inputs = {
+        "container_names": json.dumps(names),
+        "resource_group": resource_group,
+        "subscription_id": subscription_id
+    }
+    run_id, conclusion = trigger_github_workflow(repo, workflow_file, ref, inputs, github_token)
+    print(f"Workflow run ID: {run_id} ({len(names)} apps)")
+    results_text = download_artifact(repo, run_id, "delete-results", github_token, "results.json")
+    results = json.loads(results_text) if results_text is not None else {}
+    if results_text is None:
+        print("No results.json found. Deletion status unknown.")
+    for name in names:
+        results.setdefault(name, {"result": "failure", "log": f"No result (workflow conclusion: {conclusion})"})
+    print(f"Delete results: { {name: r['result'] for name, r in results.items()} }")
+    return results
+
 if __name__ == "__main__":
     # Example usage
     repo = "Simant-Asawale-Coding/AgentsBuilder"  # Change as needed
@@ -1,105 +1,149 @@
 import os
-import requests
-import time
+import json
 from dotenv import load_dotenv
+from app.services.agents_studio.github_client import get_github_client
+from app.services.agents_studio.github_workflows import run_workflow, dispatch_workflow, new_correlation_id
+from app.services.agents_studio.poll_scheduler import get_poll_scheduler
+from app.services.agents_studio.artifact_store import seal_runtime_env, sealed_env_length
 
 load_dotenv()
 
 GITHUB_API = "https://api.github.com"
+# GitHub rejects a workflow_dispatch whose inputs are longer than this
+MAX_DISPATCH_INPUTS_LENGTH = 65535
 
-def trigger_github_workflow(repo, workflow_file, ref, inputs, user_id, github_token_env="GITHUB_TOKEN"):
-    token = os.environ.get(github_token_env)
-    if not token:
-        raise RuntimeError(f"GitHub token not found in environment variable: {github_token_env}")
-    url = f"{GITHUB_API}/repos/{repo}/actions/workflows/{workflow_file}/dispatches"
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept": "application/vnd.github+json"
-    }
-    data = {"ref": ref, "inputs": inputs}
-    resp = requests.post(url, headers=headers, json=data)
-    resp.raise_for_status()
-    print("Workflow triggered successfully.")
-    # Now, poll for the workflow run
-    print("Sleeping for 10 seconds...")
-    time.sleep(10)
-    return poll_workflow_run(repo, workflow_file, ref, token)
-
-def poll_workflow_run(repo, workflow_file, ref, token, poll_interval=10, timeout=600):
-    # Get the workflow ID
-    url = f"{GITHUB_API}/repos/{repo}/actions/workflows/{workflow_file}/runs"
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept": "application/vnd.github+json"
-    }
-    start_time = time.time()
-    while True:
-        resp = requests.get(url, headers=headers, params={"branch": ref, "event": "workflow_dispatch"})
-        resp.raise_for_status()
-        runs = resp.json().get("workflow_runs", [])
-        if runs:
-            latest_run = runs[0]
-            run_id = latest_run["id"]
-            status = latest_run["status"]
-            conclusion = latest_run.get("conclusion")
-            print(f"Workflow run status: {status} (conclusion: {conclusion})")
-            if status == "completed":
-                if conclusion == "success":
-                    print("Workflow completed successfully.")
-                    return run_id
-                else:
-                    print("Workflow failed.")
-                    return None
-        if time.time() - start_time > timeout:
-            raise TimeoutError("Timed out waiting for workflow to complete.")
-        time.sleep(poll_interval)
+def trigger_github_workflow(repo, workflow_file, ref, inputs, user_id=None, github_token_env="GITHUB_TOKEN"):
+    """
+    Dispatches the deploy workflow and waits for the run it created (matched by correlation id).
+    Returns the run_id on success, None if the run failed.
+    """
+    client = get_github_client(github_token_env=github_token_env)
+    run_id, conclusion = run_workflow(client, repo, workflow_file, ref, inputs)
+    if conclusion == "success":
+        print("Workflow completed successfully.")
+        return run_id
+    print("Workflow failed.")
+    return None
 
-import os
-import requests
-import zipfile
-import io
-import time
+from app.services.agents_studio.github_artifacts import list_run_artifacts, read_artifact_file, download_artifact_zip
 
-def download_deployed_url_artifact(repo, run_id, framework, agent_file, github_token_env="GITHUB_TOKEN"):
-    token = os.environ.get(github_token_env)
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept": "application/vnd.github+json"
-    }
-    # 1. List artifacts for the workflow run
-    url = f"https://api.github.com/repos/{repo}/actions/runs/{run_id}/artifacts"
-    resp = requests.get(url, headers=headers)
-    resp.raise_for_status()
-    artifacts = resp.json().get("artifacts", [])
+def download_deployed_url_artifact(repo, run_id, framework, agent_file, github_token_env="GITHUB_TOKEN", wait_timeout=60):
+    """
+    Reads the deployed-url-<framework>-<name> artifact of a deploy run in memory and returns the URL,
+    waiting up to `wait_timeout` seconds for the artifact to appear.
+    `agent_file` may be the agent file path or the container app name; only its base name is used.
+    The URL is also recorded under data/urls/<framework>/<name>.txt.
+    """
+    client = get_github_client(github_token_env=github_token_env)
     agent_base = os.path.splitext(os.path.basename(agent_file))[0]
     artifact_name = f"deployed-url-{framework}-{agent_base}"
-    print(f"[DEBUG] agent_file: {agent_file}")
-    print(f"[DEBUG] agent_base: {agent_base}")
+    txt_filename = f"{agent_base}.txt"
     print(f"[DEBUG] artifact_name being searched: {artifact_name}")
-    print(f"[DEBUG] Artifacts found: {[a['name'] for a in artifacts]}")
-    artifact = next((a for a in artifacts if a["name"] == artifact_name), None)
-    if not artifact:
-        print(f"Artifact {artifact_name} not found.")
+    content = read_artifact_file(client, repo, run_id, artifact_name, txt_filename, wait_timeout=wait_timeout)
+    if content is None:
+        print(f"[DEBUG] Artifacts found: {[a['name'] for a in list_run_artifacts(client, repo, run_id)]}")
         return None
-    # 2. Download the artifact zip
-    download_url = artifact["archive_download_url"]
-    resp = requests.get(download_url, headers=headers)
-    resp.raise_for_status()
-    z = zipfile.ZipFile(io.BytesIO(resp.content))
-    # 3. Extract the txt file and save to data/urls/<framework>/<agent_file>.txt
-    txt_filename = f"{agent_base}.txt"
-    extract_dir = os.path.join(os.path.dirname(__file__), "..", "data", "urls", framework)
-    os.makedirs(extract_dir, exist_ok=True)
-    save_path = os.path.join(extract_dir, txt_filename)
-    with z.open(txt_filename) as f_in, open(save_path, "wb") as f_out:
-        f_out.write(f_in.read())
-    print(f"Deployed URL saved to: {save_path}")
-    # 4. Read and return the URL
-    with open(save_path, "r") as f:
-        url = f.read().strip()
+    url = content.decode("utf-8").strip()
+    save_dir = os.path.join(os.path.dirname(__file__), "..", "data", "urls", framework)
+    os.makedirs(save_dir, exist_ok=True)
+    with open(os.path.join(save_dir, txt_filename), "w") as f:
+        f.write(url)
     print(f"Deployed URL: {url}")
     return url
 
+def batch_dispatch_length(agents, agent_env, max_parallel) -> int:
+    """Length of the inputs dispatch_batch_deploy would send, JSON-encoded as in the dispatch request."""
+    inputs = {
+        "agents": json.dumps(agents),
+        "agent_env": "=" * sealed_env_length(agent_env),
+        "max_parallel": str(max_parallel),
+        "correlation_id": new_correlation_id()
+    }
+    return len(json.dumps(inputs))
+
+
+def split_batch_deploy(agents, agent_env, max_parallel):
+    """
+    Splits the matrix entries into consecutive runs whose dispatch inputs stay within
+    MAX_DISPATCH_INPUTS_LENGTH. Raises ValueError if a single agent does not fit.
+    """
+    def fits(run):
+        return batch_dispatch_length(run, {a["app_name"]: agent_env[a["app_name"]] for a in run}, max_parallel) <= MAX_DISPATCH_INPUTS_LENGTH
+    runs = [[]]
+    for agent in agents:
+        if fits(runs[-1] + [agent]):
+            runs[-1].append(agent)
+        elif runs[-1] and fits([agent]):
+            runs.append([agent])
+        else:
+            raise ValueError(f"Dispatch inputs for {agent['app_name']} exceed GitHub's limit of {MAX_DISPATCH_INPUTS_LENGTH} characters")
+    return [run for run in runs if run]
+
+
+def dispatch_batch_deploy(repo, ref, agents, agent_env, max_parallel, workflow_file="deploy-agents-batch.yml", github_token_env="GITHUB_TOKEN"):
+    """
+    Dispatches one matrix run deploying all `agents` ({"sha", "agent_file", "framework", "app_name",
+    "content_hash", "skip_build"} dicts), at most `max_parallel` at a time (the deployment slots held
+    for it). `agent_env` maps app_name to that agent's runtime secrets; it is sent encrypted (see
+    seal_runtime_env). Returns (correlation_id, dispatched_at) for iter_batch_deploy_results.
+    Raises ValueError when the inputs are too long for GitHub; see split_batch_deploy.
+    """
+    length = batch_dispatch_length(agents, agent_env, max_parallel)
+    if length > MAX_DISPATCH_INPUTS_LENGTH:
+        raise ValueError(f"Batch dispatch inputs are {length} characters, GitHub accepts at most {MAX_DISPATCH_INPUTS_LENGTH}")
+    client = get_github_client(github_token_env=github_token_env)
+    inputs = {"agents": json.dumps(agents), "agent_env": seal_runtime_env(agent_env), "max_parallel": str(max_parallel)}
+    return dispatch_workflow(client, repo, workflow_file, ref, inputs)
+
+
+def iter_batch_deploy_results(
+    repo,
+    ref,
+    correlation_id,
+    dispatched_at,
+    agents,
+    workflow_file="deploy-agents-batch.yml",
+    github_token_env="GITHUB_TOKEN",
+    timeout=1800
+):
+    """
+    Yields {"app_name", "status": "deployed"|"failed", "endpoint", "error"} for each agent of a batch
+    run as soon as its matrix job finishes, reading deployed URLs from artifacts while the run is
+    still in progress. Agents without a result when the run completes or times out are yielded as failed.
+    The run is followed through the shared PollScheduler, so its jobs are checked at the scheduler's pace.
+    """
+    client = get_github_client(github_token_env=github_token_env)
+    pending = {a["app_name"]: a for a in agents}
+    try:
+        for run in get_poll_scheduler().watch(client, repo, workflow_file, ref, correlation_id, dispatched_at, timeout):
+            run_completed = run["status"] == "completed"
+            resp = client.get(f"repos/{repo}/actions/runs/{run['id']}/jobs", params={"per_page": 100}, etag_cache=True)
+            resp.raise_for_status()
+            jobs = {job["name"]: job for job in resp.json().get("jobs", [])}
+            artifacts = {a["name"]: a for a in list_run_artifacts(client, repo, run["id"], run_completed)}
+            for app_name, agent in list(pending.items()):
+                job = jobs.get(f"deploy {app_name}")
+                if not job or job["status"] != "completed":
+                    continue
+                if job["conclusion"] != "success":
+                    pending.pop(app_name)
+                    yield {"app_name": app_name, "status": "failed", "endpoint": "", "error": f"Deploy job {job['conclusion']}"}
+                    continue
+                artifact = artifacts.get(f"deployed-url-{agent['framework']}-{app_name}")
+                if not artifact:
+                    # Uploaded by the last step; may not be listed yet.
+                    continue
+                with download_artifact_zip(client, artifact) as z:
+                    endpoint = z.read(f"{app_name}.txt").decode("utf-8").strip()
+                pending.pop(app_name)
+                yield {"app_name": app_name, "status": "deployed", "endpoint": endpoint, "error": None}
+            if not pending:
+                break
+    except TimeoutError as e:
+        print(f"[DEBUG] Batch deploy run {correlation_id}: {e}")
+    for app_name in pending:
+        yield {"app_name": app_name, "status": "failed", "endpoint": "", "error": "No result from batch deploy run"}
+
 # Example usage:
 if __name__ == "__main__":
     repo = os.getenv("GITHUB_REPO")
@@ -0,0 +1,79 @@
+"""
+Module: catalog_cache.py
+Pre-serialized, ETag-validated responses for catalog endpoints (/tools, /frameworks, /creds_schema).
+
+Payloads are serialized to bytes once per registry version and served with a strong
+ETag and Cache-Control; a matching If-None-Match gets an empty 304.
+orjson is used for serialization when installed, with a json fallback.
+"""
+import os
+import json
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+else:
+    FastJSONResponse = JSONResponse
+
+CATALOG_CACHE_MAX_AGE = int(os.environ.get("CATALOG_CACHE_MAX_AGE", "60"))
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    # If-None-Match uses weak comparison (RFC 9110 13.1.2)
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def cached_json_response(request: Request, body: bytes, etag: str, max_age: int = CATALOG_CACHE_MAX_AGE) -> Response:
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+class PrecomputedResponses:
+    """
+    Keeps the serialized bytes and ETag per key; build() only runs again when the version changes.
+    """
+
+    def __init__(self):
+        # key -> (version, body, etag)
+        self._entries: Dict[Hashable, Tuple[Hashable, bytes, str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: Hashable, build: Callable[[], Any]) -> Tuple[bytes, str]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1], entry[2]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                body = dumps(build())
+                entry = (version, body, make_etag(body))
+                self._entries[key] = entry
+            return entry[1], entry[2]
+
+
+precomputed_responses = PrecomputedResponses()
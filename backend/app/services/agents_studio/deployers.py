@@ -0,0 +1,285 @@
+"""
+Module: deployers.py
+Pluggable deployment backends for generated agents.
+
+- AzureContainerAppsDeployer: the GitHub Actions -> Azure Container Apps pipeline (minutes).
+- LocalProcessDeployer: runs the rendered agent file as a supervised local uvicorn
+  subprocess on a free port and returns its endpoint in seconds. Meant for previews
+  and offline pipeline benchmarks; idle or excess previews are reaped automatically.
+
+Use get_deployer(target) with target "azure" or "local".
+"""
+import os
+import sys
+import time
+import socket
+import atexit
+import threading
+import subprocess
+from typing import Dict, List, Optional
+import requests
+from app.services.agents_studio.azure_deploy import trigger_github_workflow, download_deployed_url_artifact
+from app.services.agents_studio.azure_delete import delete_container_app_via_github, delete_container_apps_via_github
+from app.services.agents_studio.status_cache import get_status_cache
+
+LOCAL_PREVIEW_IDLE_TTL = float(os.environ.get("LOCAL_PREVIEW_IDLE_TTL", "900"))
+LOCAL_PREVIEW_MAX = int(os.environ.get("LOCAL_PREVIEW_MAX", "10"))
+LOCAL_PREVIEW_START_TIMEOUT = float(os.environ.get("LOCAL_PREVIEW_START_TIMEOUT", "60"))
+LOCAL_PREVIEW_MAX_RESTARTS = 2
+LOCAL_PREVIEW_LOG_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data", "previews"))
+
+
+class BaseDeployer:
+    """
+    A deployer turns an agent spec into a running endpoint.
+    deploy() returns {"endpoint", "status", ...}; delete() returns True on success.
+    """
+    name = "base"
+
+    def deploy(self, spec: dict) -> dict:
+        raise NotImplementedError
+
+    def delete(self, app_name: str) -> bool:
+        raise NotImplementedError
+
+    def status(self, app_name: str) -> dict:
+        raise NotImplementedError
+
+    def delete_many(self, app_names: List[str]) -> Dict[str, dict]:
+        """Returns {app_name: {"result": "success"|"not_found"|"failure", ...}}."""
+        return {app_name: {"result": "success" if self.delete(app_name) else "failure"} for app_name in app_names}
+
+
+class AzureContainerAppsDeployer(BaseDeployer):
+    """
+    Deploys through the deploy-agent.yml workflow. The spec holds the workflow inputs:
+    sha, agent_file, framework, app_name, content_hash, skip_build and agent_env (sealed with seal_runtime_env).
+    """
+    name = "azure"
+
+    def __init__(self, workflow_file: str = "deploy-agent.yml"):
+        self.workflow_file = workflow_file
+        self.repo = os.environ.get("GITHUB_REPO")
+        self.ref = os.environ.get("GITHUB_REF", "main")
+
+    def deploy(self, spec: dict) -> dict:
+        get_status_cache().invalidate(spec["app_name"])
+        run_id = trigger_github_workflow(self.repo, self.workflow_file, self.ref, spec)
+        if not run_id:
+            raise RuntimeError("Deploy workflow did not complete successfully.")
+        endpoint = download_deployed_url_artifact(self.repo, run_id, spec["framework"], spec["app_name"])
+        if not endpoint:
+            raise RuntimeError("Deployment succeeded but the deployed-url artifact was not found. Check workflow artifact naming and logs.")
+        return {"endpoint": endpoint, "status": "deployed", "run_id": run_id}
+
+    def delete(self, app_name: str) -> bool:
+        deleted = delete_container_app_via_github(
+            self.repo, os.environ.get("GITHUB_TOKEN"), app_name,
+            os.environ.get("AZURE_RESOURCE_GROUP"), os.environ.get("AZURE_SUBSCRIPTION_ID"), ref=self.ref
+        )
+        get_status_cache().invalidate(app_name)
+        return deleted
+
+    def delete_many(self, app_names: List[str]) -> Dict[str, dict]:
+        """Deletes all apps in parallel in one agent-delete.yml run."""
+        results = delete_container_apps_via_github(
+            self.repo, os.environ.get("GITHUB_TOKEN"), app_names,
+            os.environ.get("AZURE_RESOURCE_GROUP"), os.environ.get("AZURE_SUBSCRIPTION_ID"), ref=self.ref
+        )
+        for app_name in results:
+            get_status_cache().invalidate(app_name)
+        return results
+
+    def status(self, app_name: str) -> dict:
+        return get_status_cache().get(app_name) or {"provisioningState": "Unknown"}
+
+
+class LocalProcessDeployer(BaseDeployer):
+    """
+    Runs agents as local subprocesses. The spec needs app_name and code_path (from save_agent_code);
+    runtime_env is added to the process environment.
+    """
+    name = "local"
+
+    def __init__(self, host: str = "127.0.0.1", idle_ttl: float = LOCAL_PREVIEW_IDLE_TTL, max_previews: int = LOCAL_PREVIEW_MAX):
+        self.host = host
+        self.idle_ttl = idle_ttl
+        self.max_previews = max_previews
+        self._previews: Dict[str, dict] = {}
+        self._lock = threading.RLock()
+        self._reaper: Optional[threading.Thread] = None
+        atexit.register(self.stop_all)
+
+    # --- BaseDeployer ---
+
+    def deploy(self, spec: dict) -> dict:
+        app_name = spec["app_name"]
+        with self._lock:
+            self._stop(app_name)
+            self._evict_for_new()
+            preview = {
+                "app_name": app_name,
+                "code_path": spec["code_path"],
+                "env": dict(spec.get("runtime_env") or {}),
+                "port": _free_port(self.host),
+                "restarts": 0
+            }
+            self._start(preview)
+            self._previews[app_name] = preview
+            self._ensure_reaper()
+        try:
+            self._wait_healthy(preview)
+        except Exception:
+            self.delete(app_name)
+            raise
+        return {"endpoint": preview["endpoint"], "status": "preview", "port": preview["port"], "log_path": preview["log_path"]}
+
+    def delete(self, app_name: str) -> bool:
+        with self._lock:
+            return self._stop(app_name)
+
+    def status(self, app_name: str) -> dict:
+        with self._lock:
+            preview = self._previews.get(app_name)
+            if not preview:
+                return {"status": "NotFound"}
+            code = preview["process"].poll()
+            return {
+                "status": "running" if code is None else "exited",
+                "exit_code": code,
+                "endpoint": preview["endpoint"],
+                "pid": preview["process"].pid,
+                "restarts": preview["restarts"],
+                "idle_seconds": round(time.time() - preview["last_used"], 1)
+            }
+
+    # --- preview management ---
+
+    def touch(self, app_name: str):
+        """Marks a preview as used so the reaper keeps it alive."""
+        with self._lock:
+            preview = self._previews.get(app_name)
+            if preview:
+                preview["last_used"] = time.time()
+
+    def list_previews(self) -> Dict[str, dict]:
+        with self._lock:
+            return {name: self.status(name) for name in self._previews}
+
+    def stop_all(self):
+        with self._lock:
+            for app_name in list(self._previews):
+                self._stop(app_name)
+
+    # --- internals ---
+
+    def _start(self, preview: dict):
+        code_path = preview["code_path"]
+        module = os.path.splitext(os.path.basename(code_path))[0]
+        os.makedirs(LOCAL_PREVIEW_LOG_DIR, exist_ok=True)
+        preview["log_path"] = os.path.join(LOCAL_PREVIEW_LOG_DIR, f"{preview['app_name']}.log")
+        log_file = open(preview["log_path"], "ab")
+        env = dict(os.environ, **preview["env"])
+        env["AGENT_NAME"] = preview["env"].get("AGENT_NAME", preview["app_name"])
+        preview["process"] = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", f"{module}:app", "--app-dir", os.path.dirname(code_path),
+             "--host", self.host, "--port", str(preview["port"])],
+            stdout=log_file,
+            stderr=subprocess.STDOUT,
+            env=env
+        )
+        log_file.close()
+        preview["endpoint"] = f"http://{self.host}:{preview['port']}"
+        preview["started_at"] = preview["last_used"] = time.time()
+        print(f"[DEBUG] Local preview {preview['app_name']} started (pid {preview['process'].pid}) on {preview['endpoint']}")
+
+    def _wait_healthy(self, preview: dict):
+        deadline = time.time() + LOCAL_PREVIEW_START_TIMEOUT
+        while time.time() < deadline:
+            if preview["process"].poll() is not None:
+                raise RuntimeError(f"Agent process exited with code {preview['process'].returncode}: {_tail(preview['log_path'])}")
+            try:
+                # Every generated agent is a FastAPI app, so /docs answers once it is serving.
+                if requests.get(f"{preview['endpoint']}/docs", timeout=2).ok:
+                    return
+            except requests.RequestException:
+                pass
+            time.sleep(0.25)
+        raise TimeoutError(f"Agent did not become healthy within {LOCAL_PREVIEW_START_TIMEOUT}s: {_tail(preview['log_path'])}")
+
+    def _stop(self, app_name: str) -> bool:
+        preview = self._previews.pop(app_name, None)
+        if not preview:
+            return False
+        process = preview["process"]
+        if process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        print(f"[DEBUG] Local preview {app_name} stopped")
+        return True
+
+    def _evict_for_new(self):
+        while len(self._previews) >= self.max_previews:
+            oldest = min(self._previews.values(), key=lambda p: p["last_used"])
+            self._stop(oldest["app_name"])
+
+    def _ensure_reaper(self):
+        if self._reaper is None or not self._reaper.is_alive():
+            self._reaper = threading.Thread(target=self._reap_loop, name="local-preview-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self):
+        while True:
+            time.sleep(min(30.0, self.idle_ttl))
+            with self._lock:
+                now = time.time()
+                for app_name, preview in list(self._previews.items()):
+                    if now - preview["last_used"] > self.idle_ttl:
+                        print(f"[DEBUG] Reaping idle local preview {app_name}")
+                        self._stop(app_name)
+                    elif preview["process"].poll() is not None:
+                        if preview["restarts"] < LOCAL_PREVIEW_MAX_RESTARTS:
+                            preview["restarts"] += 1
+                            print(f"[DEBUG] Local preview {app_name} exited ({preview['process'].returncode}); restarting")
+                            self._start(preview)
+                        else:
+                            self._stop(app_name)
+                if not self._previews:
+                    self._reaper = None
+                    return
+
+
+def _free_port(host: str) -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+
+def _tail(path: str, max_bytes: int = 2000) -> str:
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(f.tell() - max_bytes, 0))
+            return f.read().decode("utf-8", errors="replace")
+    except OSError:
+        return ""
+
+
+DEPLOYERS = {
+    "azure": AzureContainerAppsDeployer,
+    "local": LocalProcessDeployer
+}
+_deployers: Dict[str, BaseDeployer] = {}
+_deployers_lock = threading.Lock()
+
+
+def get_deployer(target: str = "azure") -> BaseDeployer:
+    if target not in DEPLOYERS:
+        raise ValueError(f"Unsupported deploy target: {target}")
+    with _deployers_lock:
+        if target not in _deployers:
+            _deployers[target] = DEPLOYERS[target]()
+        return _deployers[target]
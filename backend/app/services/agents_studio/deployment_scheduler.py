@@ -0,0 +1,220 @@
+"""
+Module: deployment_scheduler.py
+Bounds how many deployments run at once and decides who goes next.
+
+- A global limit caps concurrent deployments (GitHub runners / Azure quota).
+- Waiting deployments are ordered by priority class (interactive before bulk) and,
+  within a class, by weighted fair queuing across users: each user's requests get
+  virtual finish tags, so one user scripting many creations cannot starve others.
+- Admission control rejects requests up front when the queue (or a user's share of
+  it) is too deep, with an estimate of when to retry.
+- A ticket may take several slots (a batch deploying that many agents in parallel);
+  it starts only once all of them are free, so batches never hold part of the capacity
+  while waiting for the rest.
+"""
+import os
+import time
+import asyncio
+import uuid
+import itertools
+import threading
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+PRIORITIES = {"interactive": 0, "bulk": 1}
+
+MAX_CONCURRENT_DEPLOYMENTS = int(os.environ.get("MAX_CONCURRENT_DEPLOYMENTS", "4"))
+MAX_DEPLOY_QUEUE_DEPTH = int(os.environ.get("MAX_DEPLOY_QUEUE_DEPTH", "50"))
+MAX_QUEUED_PER_USER = int(os.environ.get("MAX_QUEUED_PER_USER", "10"))
+EWMA_ALPHA = 0.3
+# How often async waiters re-check whether their ticket may start.
+ASYNC_WAIT_INTERVAL = 0.5
+
+
+class QueueFullError(RuntimeError):
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class DeploymentTicket:
+    def __init__(self, user_id, priority: str, cost: float, start_tag: float, finish_tag: float, seq: int, slots: int = 1):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.priority = priority
+        self.cost = cost
+        self.slots = slots
+        self.start_tag = start_tag
+        self.finish_tag = finish_tag
+        self.seq = seq
+        self.enqueued_at = time.time()
+        self.started_at: Optional[float] = None
+
+    def sort_key(self):
+        return (PRIORITIES[self.priority], self.finish_tag, self.seq)
+
+    def to_dict(self, position: Optional[int] = None) -> dict:
+        return {
+            "ticket_id": self.id,
+            "user_id": self.user_id,
+            "priority": self.priority,
+            "slots": self.slots,
+            "state": "running" if self.started_at else "queued",
+            "position": position,
+            "waited_seconds": round((self.started_at or time.time()) - self.enqueued_at, 1)
+        }
+
+
+class DeploymentScheduler:
+    """
+    Use get_deployment_scheduler() for the shared instance. enqueue() a ticket while handling the
+    request (it raises QueueFullError when the request is not admitted), hand the ticket id back to
+    the client, then run the part that consumes CI/Azure capacity inside
+    `async with scheduler.slot(ticket): ...`. A ticket at the head of the queue blocks the ones
+    behind it, so every enqueued ticket must be waited on right away.
+    """
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT_DEPLOYMENTS, max_queue_depth=MAX_DEPLOY_QUEUE_DEPTH, max_queued_per_user=MAX_QUEUED_PER_USER):
+        self.max_concurrent = max_concurrent
+        self.max_queue_depth = max_queue_depth
+        self.max_queued_per_user = max_queued_per_user
+        self._queue: List[DeploymentTicket] = []
+        self._running: Dict[str, DeploymentTicket] = {}
+        self._user_weights: Dict[object, float] = {}
+        self._user_finish: Dict[object, float] = {}
+        self._virtual_time = 0.0
+        self._avg_duration: Optional[float] = None
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    # --- public API ---
+
+    def set_user_weight(self, user_id, weight: float):
+        """A user with weight 2 gets twice the share of deployment slots of a user with weight 1."""
+        with self._cond:
+            self._user_weights[user_id] = weight
+
+    @asynccontextmanager
+    async def slot(self, ticket: DeploymentTicket, timeout: Optional[float] = None):
+        """
+        Waits (without blocking the event loop) until an enqueued ticket may start and holds its
+        slots for the duration of the block. Raises TimeoutError if they do not free up in time.
+        The ticket is released on exit in every case.
+        """
+        try:
+            await self.wait_async(ticket, timeout)
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def enqueue(self, user_id, priority: str = "interactive", cost: float = 1.0, slots: int = 1) -> DeploymentTicket:
+        """
+        Queues a deployment of `cost` units of work that runs `slots` jobs in parallel
+        (capped at max_concurrent).
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        slots = max(1, min(slots, self.max_concurrent))
+        with self._cond:
+            if len(self._queue) >= self.max_queue_depth:
+                raise QueueFullError("Deployment queue is full", self._retry_after(len(self._queue)))
+            user_queued = sum(1 for t in self._queue if t.user_id == user_id)
+            if user_queued >= self.max_queued_per_user:
+                raise QueueFullError(f"Too many queued deployments for user {user_id}", self._retry_after(user_queued))
+            weight = self._user_weights.get(user_id, 1.0)
+            start_tag = max(self._virtual_time, self._user_finish.get(user_id, 0.0))
+            finish_tag = start_tag + cost / weight
+            self._user_finish[user_id] = finish_tag
+            ticket = DeploymentTicket(user_id, priority, cost, start_tag, finish_tag, next(self._seq), slots)
+            self._queue.append(ticket)
+            self._queue.sort(key=DeploymentTicket.sort_key)
+            return ticket
+
+    def wait(self, ticket: DeploymentTicket, timeout: Optional[float] = None):
+        """Blocks the calling thread until the ticket may start. Raises TimeoutError."""
+        deadline = time.time() + timeout if timeout is not None else None
+        with self._cond:
+            while not self._try_start(ticket):
+                remaining = deadline - time.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("Timed out waiting for a deployment slot")
+                self._cond.wait(timeout=remaining)
+
+    async def wait_async(self, ticket: DeploymentTicket, timeout: Optional[float] = None):
+        """Like wait(), but polls from the event loop instead of holding a thread."""
+        deadline = time.time() + timeout if timeout is not None else None
+        while True:
+            with self._cond:
+                if self._try_start(ticket):
+                    return
+            if deadline is not None and time.time() >= deadline:
+                raise TimeoutError("Timed out waiting for a deployment slot")
+            await asyncio.sleep(ASYNC_WAIT_INTERVAL)
+
+    def release(self, ticket: DeploymentTicket):
+        with self._cond:
+            if self._running.pop(ticket.id, None) is not None:
+                duration = time.time() - ticket.started_at
+                self._avg_duration = duration if self._avg_duration is None else EWMA_ALPHA * duration + (1 - EWMA_ALPHA) * self._avg_duration
+            elif ticket in self._queue:
+                self._queue.remove(ticket)
+            if not any(t.user_id == ticket.user_id for t in itertools.chain(self._queue, self._running.values())):
+                # Idle users do not keep credit or debt.
+                self._user_finish.pop(ticket.user_id, None)
+            self._cond.notify_all()
+
+    def get_position(self, ticket_id: str) -> Optional[int]:
+        """1-based position of a queued ticket, 0 if it is running, None if unknown."""
+        with self._cond:
+            if ticket_id in self._running:
+                return 0
+            return next((i + 1 for i, t in enumerate(self._queue) if t.id == ticket_id), None)
+
+    def get_status(self, user_id=None) -> dict:
+        with self._cond:
+            queued = [t.to_dict(i + 1) for i, t in enumerate(self._queue) if user_id is None or t.user_id == user_id]
+            running = [t.to_dict(0) for t in self._running.values() if user_id is None or t.user_id == user_id]
+            return {
+                "max_concurrent": self.max_concurrent,
+                "running_total": len(self._running),
+                "slots_in_use": self._running_slots(),
+                "queued_total": len(self._queue),
+                "avg_deploy_seconds": round(self._avg_duration, 1) if self._avg_duration else None,
+                "running": running,
+                "queued": queued
+            }
+
+    # --- internals ---
+
+    def _try_start(self, ticket: DeploymentTicket) -> bool:
+        # Caller holds self._cond.
+        if not (self._queue and self._queue[0] is ticket):
+            return False
+        if self._running_slots() + ticket.slots > self.max_concurrent:
+            return False
+        self._queue.pop(0)
+        ticket.started_at = time.time()
+        self._running[ticket.id] = ticket
+        self._virtual_time = max(self._virtual_time, ticket.start_tag)
+        # Another slot may still be free for the next ticket in line.
+        self._cond.notify_all()
+        return True
+
+    def _running_slots(self) -> int:
+        return sum(t.slots for t in self._running.values())
+
+    def _retry_after(self, ahead: int) -> int:
+        avg = self._avg_duration or 120.0
+        return max(1, int(avg * (ahead + 1) / self.max_concurrent))
+
+
+_scheduler: Optional[DeploymentScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_deployment_scheduler() -> DeploymentScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = DeploymentScheduler()
+        return _scheduler
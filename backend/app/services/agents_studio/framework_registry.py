@@ -1,5 +1,10 @@
 import os
 import json
+import time
+import threading
+from typing import Dict, Optional, Tuple
+from jsonschema import Draft202012Validator, SchemaError
+from app.services.agents_studio.catalog_cache import dumps, make_etag
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../'))
 AGENTS_TEMPLATES_DIR = os.path.join(BASE_DIR, 'agents_templates')
@@ -36,14 +41,84 @@ def get_frameworks():
         })
     return frameworks
 
-def get_framework_creds_schema(framework_name: str):
-    schema_path = os.path.abspath(os.path.join(os.path.dirname(__file__), f"../schemas/{framework_name}_creds_schema.json"))
-    if not os.path.isfile(schema_path):
+SCHEMAS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../schemas"))
+# How often a cached schema checks its file's mtime; validation between checks is pure in-memory.
+SCHEMA_RELOAD_INTERVAL = float(os.environ.get("SCHEMA_RELOAD_INTERVAL", "2"))
+
+# framework_name -> {"mtime", "checked_at", "schema", "validator", "body", "etag"}
+_schema_cache: Dict[str, dict] = {}
+_schema_lock = threading.Lock()
+
+
+def _load_schema_entry(framework_name: str, schema_path: str, mtime: Optional[float]) -> dict:
+    schema = {}
+    if mtime is None:
         print(f"[framework_registry] Schema file not found: {schema_path}")
-        return {}
+    else:
+        try:
+            with open(schema_path, "r") as f:
+                schema = json.load(f)
+        except Exception as e:
+            print(f"[framework_registry] Failed to load schema for {framework_name} at {schema_path}: {e}")
+    schema_error = None
     try:
-        with open(schema_path, "r") as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"[framework_registry] Failed to load schema for {framework_name} at {schema_path}: {e}")
-        return {}
+        Draft202012Validator.check_schema(schema)
+        if Draft202012Validator(schema).is_valid({}):
+            # e.g. a bare {"KEY": "string"} map: only unknown keywords, so it would accept anything.
+            raise SchemaError("schema accepts empty credentials; it must be an object schema with required properties")
+    except SchemaError as e:
+        print(f"[framework_registry] Invalid schema for {framework_name} at {schema_path}: {e.message}")
+        schema_error = e
+    body = dumps(schema)
+    return {
+        "mtime": mtime,
+        "schema": schema,
+        "schema_error": schema_error,
+        # Compiled once per file version; jsonschema.validate() would rebuild it on every call.
+        "validator": Draft202012Validator(schema),
+        "body": body,
+        "etag": make_etag(body)
+    }
+
+
+def _get_schema_entry(framework_name: str) -> dict:
+    now = time.time()
+    entry = _schema_cache.get(framework_name)
+    if entry is not None and now - entry["checked_at"] < SCHEMA_RELOAD_INTERVAL:
+        return entry
+    if not any(fw["name"] == framework_name for fw in FRAMEWORKS):
+        # Unknown names are not cached, so arbitrary URLs cannot grow the cache.
+        return _load_schema_entry(framework_name, os.path.join(SCHEMAS_DIR, "unknown"), None)
+    with _schema_lock:
+        entry = _schema_cache.get(framework_name)
+        if entry is not None and now - entry["checked_at"] < SCHEMA_RELOAD_INTERVAL:
+            return entry
+        schema_path = os.path.join(SCHEMAS_DIR, f"{framework_name}_creds_schema.json")
+        try:
+            mtime = os.stat(schema_path).st_mtime
+        except OSError:
+            mtime = None
+        if entry is None or entry["mtime"] != mtime:
+            entry = _load_schema_entry(framework_name, schema_path, mtime)
+        entry["checked_at"] = now
+        _schema_cache[framework_name] = entry
+        return entry
+
+
+def get_framework_creds_schema(framework_name: str) -> dict:
+    """Cached schema; reloaded when the file changes. Do not mutate the returned dict."""
+    return _get_schema_entry(framework_name)["schema"]
+
+
+def get_framework_creds_schema_json(framework_name: str) -> Tuple[bytes, str]:
+    """Serialized schema and its strong ETag, for serving over HTTP."""
+    entry = _get_schema_entry(framework_name)
+    return entry["body"], entry["etag"]
+
+
+def validate_framework_creds(framework_name: str, credentials: dict):
+    """Raises jsonschema.ValidationError (or SchemaError for a broken schema file) if invalid."""
+    entry = _get_schema_entry(framework_name)
+    if entry["schema_error"] is not None:
+        raise entry["schema_error"]
+    entry["validator"].validate(credentials)
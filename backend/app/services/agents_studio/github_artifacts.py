@@ -0,0 +1,124 @@
+"""
+Module: github_artifacts.py
+Lists and reads GitHub Actions artifacts entirely in memory.
+
+Artifact zips are streamed into a buffer with a size cap and the needed members
+are read straight from the zip, so nothing is written to the working directory
+and concurrent jobs cannot overwrite each other's files. Artifact listings of
+finished runs never change and are cached per run id.
+"""
+import io
+import time
+import zipfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+from app.services.agents_studio.github_client import GitHubClient, GITHUB_API
+from app.services.agents_studio.poll_scheduler import rate_limit_factor
+
+# Status/result artifacts are a few KB; anything near this is not one of ours.
+MAX_ARTIFACT_BYTES = 10 * 1024 * 1024
+MAX_CACHED_RUNS = 256
+
+_listing_cache: "OrderedDict[tuple, List[dict]]" = OrderedDict()
+_listing_lock = threading.Lock()
+
+
+class ArtifactTooLargeError(RuntimeError):
+    pass
+
+
+def list_run_artifacts(client: GitHubClient, repo, run_id, run_completed: bool = True) -> List[dict]:
+    """
+    Returns the artifacts of a workflow run. Non-empty listings of completed runs are cached per run id.
+    """
+    key = (repo, str(run_id))
+    with _listing_lock:
+        if key in _listing_cache:
+            _listing_cache.move_to_end(key)
+            return _listing_cache[key]
+    resp = client.get(f"{GITHUB_API}/repos/{repo}/actions/runs/{run_id}/artifacts", params={"per_page": 100}, etag_cache=True)
+    resp.raise_for_status()
+    artifacts = resp.json().get("artifacts", [])
+    if artifacts and run_completed:
+        with _listing_lock:
+            _listing_cache[key] = artifacts
+            while len(_listing_cache) > MAX_CACHED_RUNS:
+                _listing_cache.popitem(last=False)
+    return artifacts
+
+
+def find_artifact(client: GitHubClient, repo, run_id, artifact_name, run_completed: bool = True) -> Optional[dict]:
+    artifacts = list_run_artifacts(client, repo, run_id, run_completed)
+    return next((a for a in artifacts if a["name"] == artifact_name), None)
+
+
+def wait_for_artifact(client: GitHubClient, repo, run_id, artifact_name, timeout: float = 60) -> Optional[dict]:
+    """
+    Waits for an artifact of a completed run to become listable and returns it, or None after `timeout`.
+    Artifacts are usually visible as soon as the run completes, so this starts checking immediately
+    and backs off (1s, 2s, 4s, ... stretched when the rate limit runs low) instead of sleeping a fixed time.
+    """
+    deadline = time.time() + timeout
+    delay = 1.0
+    while True:
+        artifact = find_artifact(client, repo, run_id, artifact_name)
+        if artifact or time.time() >= deadline:
+            return artifact
+        time.sleep(min(delay * rate_limit_factor(client), max(deadline - time.time(), 0)))
+        delay = min(delay * 2, 15.0)
+
+
+def download_artifact_zip(client: GitHubClient, artifact: dict, max_bytes: int = MAX_ARTIFACT_BYTES) -> zipfile.ZipFile:
+    """
+    Streams an artifact archive into memory and returns it as an open ZipFile.
+    """
+    if artifact.get("size_in_bytes", 0) > max_bytes:
+        raise ArtifactTooLargeError(f"Artifact {artifact['name']} is {artifact['size_in_bytes']} bytes (limit {max_bytes}).")
+    buffer = io.BytesIO()
+    with client.get(artifact["archive_download_url"], stream=True) as resp:
+        resp.raise_for_status()
+        for chunk in resp.iter_content(chunk_size=64 * 1024):
+            buffer.write(chunk)
+            if buffer.tell() > max_bytes:
+                raise ArtifactTooLargeError(f"Artifact {artifact['name']} exceeds {max_bytes} bytes.")
+    buffer.seek(0)
+    return zipfile.ZipFile(buffer)
+
+
+def read_artifact_members(
+    client: GitHubClient,
+    repo,
+    run_id,
+    artifact_name,
+    members: Optional[Iterable[str]] = None,
+    max_bytes: int = MAX_ARTIFACT_BYTES,
+    wait_timeout: float = 0
+) -> Optional[Dict[str, bytes]]:
+    """
+    Returns {member_name: content} for the requested members of an artifact (all members when None),
+    or None if the run has no artifact with that name. Missing members are left out.
+    With wait_timeout > 0 the artifact is waited for up to that many seconds.
+    """
+    artifact = wait_for_artifact(client, repo, run_id, artifact_name, wait_timeout) if wait_timeout else find_artifact(client, repo, run_id, artifact_name)
+    if not artifact:
+        print(f"Artifact {artifact_name} not found.")
+        return None
+    with download_artifact_zip(client, artifact, max_bytes) as z:
+        wanted = set(members) if members is not None else None
+        contents = {}
+        for info in z.infolist():
+            if info.is_dir() or (wanted is not None and info.filename not in wanted):
+                continue
+            if info.file_size > max_bytes:
+                raise ArtifactTooLargeError(f"Member {info.filename} of {artifact_name} is {info.file_size} bytes uncompressed.")
+            contents[info.filename] = z.read(info)
+        return contents
+
+
+def read_artifact_file(client: GitHubClient, repo, run_id, artifact_name, member, max_bytes: int = MAX_ARTIFACT_BYTES, wait_timeout: float = 0) -> Optional[bytes]:
+    """
+    Returns the content of a single file inside an artifact, or None if the artifact or file is missing.
+    """
+    contents = read_artifact_members(client, repo, run_id, artifact_name, [member], max_bytes, wait_timeout)
+    return contents.get(member) if contents else None
@@ -0,0 +1,194 @@
+"""
+Module: github_client.py
+Shared HTTP client for all GitHub API access.
+
+Holds one pooled keep-alive requests.Session per token, retries transient
+failures, answers repeated GETs from an ETag cache (304 responses do not count
+against the rate limit), waits out primary/secondary rate limits and logs
+per-endpoint latency.
+"""
+import os
+import re
+import time
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+load_dotenv()
+
+GITHUB_API = "https://api.github.com"
+
+logger = logging.getLogger(__name__)
+
+# Numeric ids and SHAs are folded so latency is aggregated per endpoint, not per resource.
+_ID_SEGMENT = re.compile(r"/(\d+|[0-9a-f]{40})(?=/|$)")
+
+
+class GitHubClient:
+    """
+    Pooled GitHub REST client. Use get_github_client() instead of creating instances directly.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        pool_maxsize: int = 20,
+        max_retries: int = 3,
+        max_rate_limit_wait: float = 120.0,
+        etag_cache_size: int = 512
+    ):
+        self.max_rate_limit_wait = max_rate_limit_wait
+        self.etag_cache_size = etag_cache_size
+        self.rate_limit_remaining: Optional[int] = None
+        self.rate_limit_limit: Optional[int] = None
+        self.rate_limit_reset: Optional[float] = None
+        self._etag_cache: Dict[Tuple, Tuple[str, requests.Response]] = {}
+        self._latency: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"token {token}",
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": "2022-11-28"
+        })
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=0.5,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD", "PUT", "DELETE", "OPTIONS"]),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    # --- public API ---
+
+    def request(self, method: str, path: str, params: Optional[dict] = None, etag_cache: bool = False, **kwargs) -> requests.Response:
+        """
+        Sends a request to the GitHub API. `path` may be a full URL or a path relative to api.github.com.
+        With etag_cache=True, GETs are sent with If-None-Match and a 304 returns the cached response.
+        """
+        url = path if path.startswith("http") else f"{GITHUB_API}/{path.lstrip('/')}"
+        method = method.upper()
+        cache_key = (url, tuple(sorted((params or {}).items()))) if etag_cache and method == "GET" else None
+        cached = None
+        headers = dict(kwargs.pop("headers", None) or {})
+        if cache_key:
+            with self._lock:
+                cached = self._etag_cache.get(cache_key)
+            if cached:
+                headers["If-None-Match"] = cached[0]
+
+        while True:
+            start = time.perf_counter()
+            resp = self.session.request(method, url, params=params, headers=headers, **kwargs)
+            self._record_latency(method, url, resp.status_code, time.perf_counter() - start)
+            self._update_rate_limit(resp)
+            wait = self._rate_limit_wait(resp)
+            if wait is None:
+                break
+            if wait > self.max_rate_limit_wait:
+                logger.warning(f"[github_client] Rate limited on {method} {url}; reset in {wait:.0f}s exceeds max wait")
+                break
+            logger.warning(f"[github_client] Rate limited on {method} {url}; waiting {wait:.1f}s")
+            time.sleep(wait)
+
+        if cache_key:
+            if resp.status_code == 304 and cached:
+                return cached[1]
+            etag = resp.headers.get("ETag")
+            if resp.ok and etag:
+                resp.content  # read the body so the cached response stays usable
+                with self._lock:
+                    if len(self._etag_cache) >= self.etag_cache_size:
+                        self._etag_cache.pop(next(iter(self._etag_cache)))
+                    self._etag_cache[cache_key] = (etag, resp)
+        return resp
+
+    def get(self, path: str, params: Optional[dict] = None, etag_cache: bool = False, **kwargs) -> requests.Response:
+        return self.request("GET", path, params=params, etag_cache=etag_cache, **kwargs)
+
+    def post(self, path: str, json: Optional[dict] = None, **kwargs) -> requests.Response:
+        return self.request("POST", path, json=json, **kwargs)
+
+    def patch(self, path: str, json: Optional[dict] = None, **kwargs) -> requests.Response:
+        return self.request("PATCH", path, json=json, **kwargs)
+
+    def put(self, path: str, json: Optional[dict] = None, **kwargs) -> requests.Response:
+        return self.request("PUT", path, json=json, **kwargs)
+
+    def get_latency_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns {"GET /repos/{id}/...": {"count", "total_ms", "avg_ms", "max_ms"}} for all endpoints called so far.
+        """
+        with self._lock:
+            return {
+                endpoint: dict(stats, avg_ms=stats["total_ms"] / stats["count"])
+                for endpoint, stats in self._latency.items()
+            }
+
+    # --- internals ---
+
+    def _record_latency(self, method: str, url: str, status: int, elapsed: float):
+        endpoint = f"{method} {_ID_SEGMENT.sub('/{id}', url.split('?')[0].replace(GITHUB_API, ''))}"
+        elapsed_ms = elapsed * 1000
+        with self._lock:
+            stats = self._latency.setdefault(endpoint, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            stats["count"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        logger.debug(f"[github_client] {endpoint} -> {status} in {elapsed_ms:.0f}ms")
+
+    def _update_rate_limit(self, resp: requests.Response):
+        remaining = resp.headers.get("X-RateLimit-Remaining")
+        if remaining is None:
+            return
+        with self._lock:
+            self.rate_limit_remaining = int(remaining)
+            self.rate_limit_limit = int(resp.headers.get("X-RateLimit-Limit", self.rate_limit_limit or 0)) or None
+            reset = resp.headers.get("X-RateLimit-Reset")
+            self.rate_limit_reset = float(reset) if reset else None
+        if self.rate_limit_remaining < 100:
+            logger.warning(f"[github_client] Only {self.rate_limit_remaining} GitHub API requests left until reset")
+
+    def _rate_limit_wait(self, resp: requests.Response) -> Optional[float]:
+        """
+        Returns the number of seconds to wait before retrying a rate limited response, or None.
+        """
+        if resp.status_code not in (403, 429):
+            return None
+        retry_after = resp.headers.get("Retry-After")
+        if retry_after:
+            return float(retry_after)
+        if resp.headers.get("X-RateLimit-Remaining") == "0":
+            reset = float(resp.headers.get("X-RateLimit-Reset", time.time()))
+            return max(reset - time.time(), 0) + 1
+        if "secondary rate limit" in resp.text.lower():
+            # GitHub asks to wait at least a minute when no Retry-After is sent.
+            return 60.0
+        return None
+
+
+_clients: Dict[str, GitHubClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_github_client(token: Optional[str] = None, github_token_env: str = "GITHUB_TOKEN") -> GitHubClient:
+    """
+    Returns the shared client for a token (read from `github_token_env` when not given).
+    """
+    token = token or os.environ.get(github_token_env)
+    if not token:
+        raise RuntimeError(f"GitHub token not found in environment variable: {github_token_env}")
+    with _clients_lock:
+        client = _clients.get(token)
+        if client is None:
+            client = GitHubClient(token)
+            _clients[token] = client
+        return client
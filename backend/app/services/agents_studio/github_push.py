@@ -3,12 +3,125 @@ Module: github_push.py
 Pushes generated agent code and requirements.txt to a specified GitHub repository/branch.
 """
 import os
+import json
 import base64
-import requests
-from typing import Optional
+from typing import Dict, Optional, Union
 from dotenv import load_dotenv
+from app.services.agents_studio.github_client import get_github_client, GITHUB_API
 load_dotenv()
 
+AGENTS_TEMPLATES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../../agents_templates'))
+
+
+class NonFastForwardError(RuntimeError):
+    """Raised when the branch moved between reading the ref and updating it."""
+
+
+def parse_repo_url(repo_url: str):
+    """
+    Returns (owner, repo) for a GitHub repository URL.
+    """
+    url = repo_url[:-4] if repo_url.endswith(".git") else repo_url
+    parts = url.rstrip("/").split("/")
+    return parts[-2], parts[-1]
+
+
+def get_agent_remote_path(framework: str, agent_file_path: str, agents_dir: str = "agents") -> str:
+    """
+    Remote path of the agent code inside its bundle directory:
+    <agents_dir>/<framework>/<agent_name>/<agent_name>.py
+    """
+    agent_filename = os.path.basename(agent_file_path)
+    agent_name = os.path.splitext(agent_filename)[0]
+    return f"{agents_dir}/{framework}/{agent_name}/{agent_filename}"
+
+
+def push_files_to_github(
+    files: Dict[str, Union[str, bytes]],
+    repo_url: str,
+    branch: str = "main",
+    commit_message: Optional[str] = None,
+    github_token_env: str = "GITHUB_TOKEN",
+    max_retries: int = 3
+) -> str:
+    """
+    Pushes several files to the given repo/branch as a single commit using the Git Data API.
+    `files` maps remote paths to their content. Text files are sent inline in the tree, so a
+    push always takes five API calls (ref, commit, tree, commit, ref update) regardless of the
+    number of files; only non UTF-8 content needs an extra blob upload.
+    If the branch moved in the meantime (non fast-forward), the commit is rebuilt on the new head.
+    Returns the commit SHA.
+    """
+    client = get_github_client(github_token_env=github_token_env)
+    owner, repo = parse_repo_url(repo_url)
+    base_url = f"{GITHUB_API}/repos/{owner}/{repo}/git"
+
+    def request(method: str, url: str, **kwargs):
+        resp = client.request(method, url, **kwargs)
+        if resp.status_code == 422 and method == "PATCH":
+            raise NonFastForwardError(resp.text)
+        if not resp.ok:
+            raise RuntimeError(f"GitHub {method} {url} failed: {resp.status_code} {resp.text}")
+        return resp.json()
+
+    tree_entries = []
+    for remote_path, content in files.items():
+        entry = {"path": remote_path, "mode": "100644", "type": "blob"}
+        if isinstance(content, bytes):
+            try:
+                content = content.decode("utf-8")
+            except UnicodeDecodeError:
+                blob = request("POST", f"{base_url}/blobs", json={
+                    "content": base64.b64encode(content).decode("utf-8"),
+                    "encoding": "base64"
+                })
+                entry["sha"] = blob["sha"]
+        if "sha" not in entry:
+            entry["content"] = content
+        tree_entries.append(entry)
+
+    message = commit_message or f"Add/update {', '.join(os.path.basename(p) for p in files)}"
+    for attempt in range(max_retries):
+        head_sha = request("GET", f"{base_url}/ref/heads/{branch}")["object"]["sha"]
+        base_tree = request("GET", f"{base_url}/commits/{head_sha}")["tree"]["sha"]
+        tree = request("POST", f"{base_url}/trees", json={"base_tree": base_tree, "tree": tree_entries})
+        commit = request("POST", f"{base_url}/commits", json={
+            "message": message,
+            "tree": tree["sha"],
+            "parents": [head_sha]
+        })
+        try:
+            request("PATCH", f"{base_url}/refs/heads/{branch}", json={"sha": commit["sha"], "force": False})
+            return commit["sha"]
+        except NonFastForwardError:
+            print(f"[github_push] {branch} moved during push, retrying ({attempt + 1}/{max_retries})")
+    raise RuntimeError(f"Failed to update {branch} after {max_retries} attempts (non fast-forward).")
+
+
+def build_agent_bundle(
+    agent_file_path: str,
+    framework: str,
+    agents_dir: str = "agents",
+    agent_config: Optional[dict] = None
+) -> Dict[str, Union[str, bytes]]:
+    """
+    Returns {remote_path: content} for an agent bundle under <agents_dir>/<framework>/<agent_name>/:
+    the agent code, the framework requirements.txt and an agent.json with the per-agent config.
+    """
+    agent_remote_path = get_agent_remote_path(framework, agent_file_path, agents_dir)
+    bundle_dir = os.path.dirname(agent_remote_path)
+    with open(agent_file_path, "rb") as f:
+        files = {agent_remote_path: f.read()}
+    requirements_path = os.path.join(AGENTS_TEMPLATES_DIR, framework, "requirements.txt")
+    if os.path.isfile(requirements_path):
+        with open(requirements_path, "rb") as f:
+            files[f"{bundle_dir}/requirements.txt"] = f.read()
+    config = {"framework": framework, "agent_file": os.path.basename(agent_file_path)}
+    config.update(agent_config or {})
+    files[f"{bundle_dir}/agent.json"] = json.dumps(config, indent=2, sort_keys=True)
+    return files
+
+
 def push_agent_to_github(
     agent_file_path: str,
     framework: str,
@@ -16,55 +129,22 @@ def push_agent_to_github(
     branch: str = "main",
     agents_dir: str = "agents",
     commit_message: Optional[str] = None,
-    github_token_env: str = "GITHUB_TOKEN"
+    github_token_env: str = "GITHUB_TOKEN",
+    agent_config: Optional[dict] = None
 ) -> str:
     """
-    Pushes the agent file to the specified GitHub repo/branch using the GitHub REST API.
-    The agent file is uploaded to agents/<framework>/<file.py>.
+    Pushes the agent bundle (see build_agent_bundle) to the specified GitHub repo/branch in a single commit.
     Returns the commit SHA of the push.
     """
-    import json
-
-    token = os.environ.get(github_token_env)
-    if not token:
-        raise RuntimeError(f"GitHub token not found in environment variable: {github_token_env}")
-
-    # Parse repo owner/name from repo_url
-    parts = repo_url.rstrip(".git").split("/")
-    owner = parts[-2]
-    repo = parts[-1]
-
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept": "application/vnd.github+json"
-    }
-
-    def upload_file(local_path: str, remote_path: str):
-        with open(local_path, "rb") as f:
-            content = base64.b64encode(f.read()).decode("utf-8")
-        url = f"https://api.github.com/repos/{owner}/{repo}/contents/{remote_path}"
-        # Get the current file SHA if it exists (for updates)
-        params = {"ref": branch}
-        resp = requests.get(url, headers=headers, params=params)
-        sha = resp.json().get("sha") if resp.status_code == 200 else None
-        data = {
-            "message": commit_message or f"Add/update {os.path.basename(local_path)}",
-            "content": content,
-            "branch": branch
-        }
-        if sha:
-            data["sha"] = sha
-        response = requests.put(url, headers=headers, json=data)
-        if not response.ok:
-            raise RuntimeError(f"Failed to upload {remote_path}: {response.status_code} {response.text}")
-        return response.json()["commit"]["sha"]
-
-    # Push agent file to agents/<framework>/<file.py>
-    agent_filename = os.path.basename(agent_file_path)
-    agent_remote_path = f"{agents_dir}/{framework}/{agent_filename}"
-    commit_sha = upload_file(agent_file_path, agent_remote_path)
-
-    return commit_sha
+    files = build_agent_bundle(agent_file_path, framework, agents_dir, agent_config)
+    agent_name = os.path.splitext(os.path.basename(agent_file_path))[0]
+    return push_files_to_github(
+        files,
+        repo_url=repo_url,
+        branch=branch,
+        commit_message=commit_message or f"Add/update agent {agent_name}",
+        github_token_env=github_token_env
+    )
 
 if __name__ == "__main__":
     # Simulate pushing the generated agent to GitHub under agents/<framework>/
@@ -0,0 +1,77 @@
+"""
+Module: github_workflows.py
+Dispatches GitHub Actions workflows and finds the exact run that a dispatch created.
+
+The workflow_dispatch API does not return a run id, so every dispatch carries a
+`correlation_id` input that the workflows put into their `run-name`. Runs are
+matched on that id instead of assuming the newest run is ours, which lets any
+number of deployments, status checks and deletes run against the same workflow
+file at the same time.
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+from app.services.agents_studio.github_client import GitHubClient, GITHUB_API
+
+
+def new_correlation_id() -> str:
+    return uuid.uuid4().hex
+
+
+def dispatch_workflow(client: GitHubClient, repo, workflow_file, ref, inputs, correlation_id: Optional[str] = None) -> Tuple[str, datetime]:
+    """
+    Triggers a workflow_dispatch run with a correlation id added to its inputs.
+    Returns (correlation_id, dispatch_time).
+    """
+    correlation_id = correlation_id or new_correlation_id()
+    url = f"{GITHUB_API}/repos/{repo}/actions/workflows/{workflow_file}/dispatches"
+    data = {"ref": ref, "inputs": dict(inputs, correlation_id=correlation_id)}
+    dispatched_at = datetime.now(timezone.utc)
+    response = client.post(url, json=data)
+    if response.status_code != 204:
+        raise Exception(f"Failed to trigger workflow: {response.status_code}, {response.text}")
+    print(f"Workflow {workflow_file} triggered (correlation_id={correlation_id}).")
+    return correlation_id, dispatched_at
+
+
+def run_matches(run: dict, correlation_id: str) -> bool:
+    return correlation_id in (run.get("display_title") or "") or correlation_id in (run.get("name") or "")
+
+
+def find_workflow_run(client: GitHubClient, repo, workflow_file, ref, correlation_id, dispatched_at: Optional[datetime] = None) -> Optional[dict]:
+    """
+    Returns the run created by the dispatch with the given correlation id, or None if it has not appeared yet.
+    """
+    url = f"{GITHUB_API}/repos/{repo}/actions/workflows/{workflow_file}/runs"
+    params = {"branch": ref, "event": "workflow_dispatch", "per_page": 50}
+    if dispatched_at:
+        # Allow for clock skew between us and GitHub.
+        since = (dispatched_at - timedelta(minutes=2)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        params["created"] = f">={since}"
+    resp = client.get(url, params=params, etag_cache=True)
+    resp.raise_for_status()
+    runs = resp.json().get("workflow_runs", [])
+    return next((run for run in runs if run_matches(run, correlation_id)), None)
+
+
+def get_workflow_run(client: GitHubClient, repo, run_id) -> dict:
+    resp = client.get(f"{GITHUB_API}/repos/{repo}/actions/runs/{run_id}", etag_cache=True)
+    resp.raise_for_status()
+    return resp.json()
+
+
+def wait_for_workflow_run(client: GitHubClient, repo, workflow_file, ref, correlation_id, dispatched_at=None, timeout=600) -> Tuple[int, Optional[str]]:
+    """
+    Waits for the correlated run to complete. Returns (run_id, conclusion) or raises TimeoutError.
+    Polling is done by the shared PollScheduler, which batches all pending runs of a workflow.
+    """
+    from app.services.agents_studio.poll_scheduler import get_poll_scheduler
+    return get_poll_scheduler().wait(client, repo, workflow_file, ref, correlation_id, dispatched_at, timeout)
+
+
+def run_workflow(client: GitHubClient, repo, workflow_file, ref, inputs, timeout=600) -> Tuple[int, Optional[str]]:
+    """
+    Dispatches a workflow and waits for the run it created. Returns (run_id, conclusion).
+    """
+    correlation_id, dispatched_at = dispatch_workflow(client, repo, workflow_file, ref, inputs)
+    return wait_for_workflow_run(client, repo, workflow_file, ref, correlation_id, dispatched_at, timeout)
@@ -0,0 +1,273 @@
+"""
+Module: poll_scheduler.py
+Central scheduler for waiting on GitHub Actions workflow runs.
+
+Instead of every caller polling its own run on a fixed interval, waiters are
+registered here and one background thread polls on their behalf:
+- all pending runs of the same workflow are resolved from a single list-runs call;
+- the poll interval adapts to how long each stage (queued, in_progress) of that
+  workflow has typically taken (EWMA of observed durations), polling rarely early
+  in a stage and often once it is due to finish;
+- every interval is stretched as the remaining GitHub rate limit drops.
+
+A failed poll only delays that workflow's next poll. Waiters check on the poll
+thread while they wait, restart it if it died, and give up with TimeoutError
+shortly after their deadline even if it never ran again.
+"""
+import time
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+from app.services.agents_studio.github_client import GitHubClient, GITHUB_API
+from app.services.agents_studio.github_workflows import run_matches
+
+logger = logging.getLogger(__name__)
+
+MIN_POLL_INTERVAL = 3.0
+MAX_POLL_INTERVAL = 30.0
+DEFAULT_POLL_INTERVAL = 10.0
+MAX_RATE_LIMIT_FACTOR = 8.0
+EWMA_ALPHA = 0.3
+# How often a blocked waiter checks that the poll thread is alive, and how long past its
+# deadline it waits for the thread before timing out on its own.
+WAITER_CHECK_INTERVAL = 15.0
+WAITER_GRACE = MAX_POLL_INTERVAL
+
+
+def rate_limit_factor(client: GitHubClient) -> float:
+    """
+    Multiplier for poll intervals: 1 while at least half of the rate limit is left,
+    growing up to MAX_RATE_LIMIT_FACTOR as it runs out.
+    """
+    remaining, limit = client.rate_limit_remaining, client.rate_limit_limit
+    if remaining is None or not limit or remaining >= limit / 2:
+        return 1.0
+    return min(MAX_RATE_LIMIT_FACTOR, (limit / 2) / max(remaining, 1))
+
+
+class _Waiter:
+    def __init__(self, correlation_id: str, dispatched_at: datetime, timeout: float):
+        self.correlation_id = correlation_id
+        self.dispatched_at = dispatched_at
+        self.deadline = time.time() + timeout
+        self.stage = "queued"
+        self.stage_started = time.time()
+        self.run_id: Optional[int] = None
+        self.run: Optional[dict] = None
+        self.conclusion: Optional[str] = None
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+        # Set after every poll of the waiter's group; used by watch().
+        self.polled = threading.Event()
+
+
+class PollScheduler:
+    """
+    Multiplexes waits on correlated workflow runs. Use get_poll_scheduler() for the shared instance.
+    """
+
+    def __init__(self):
+        # (client, repo, workflow_file, ref) -> waiters
+        self._groups: Dict[Tuple, List[_Waiter]] = {}
+        self._next_poll: Dict[Tuple, float] = {}
+        # (workflow_file, stage) -> EWMA of the stage duration in seconds
+        self._stage_durations: Dict[Tuple[str, str], float] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- public API ---
+
+    def wait(self, client: GitHubClient, repo, workflow_file, ref, correlation_id, dispatched_at: Optional[datetime] = None, timeout=600) -> Tuple[int, Optional[str]]:
+        """
+        Blocks until the correlated run completes. Returns (run_id, conclusion) or raises TimeoutError.
+        """
+        key, waiter = self._register(client, repo, workflow_file, ref, correlation_id, dispatched_at, timeout)
+        self._await(key, waiter, waiter.done)
+        if waiter.error:
+            raise waiter.error
+        return waiter.run_id, waiter.conclusion
+
+    def watch(self, client: GitHubClient, repo, workflow_file, ref, correlation_id, dispatched_at: Optional[datetime] = None, timeout=600) -> Iterator[dict]:
+        """
+        Yields the correlated run each time the scheduler polls it, ending with the completed run.
+        Raises TimeoutError like wait(). Lets callers follow a run's progress (e.g. its jobs)
+        at the scheduler's pace instead of running a poll loop of their own.
+        """
+        key, waiter = self._register(client, repo, workflow_file, ref, correlation_id, dispatched_at, timeout)
+        try:
+            while True:
+                self._await(key, waiter, waiter.polled)
+                waiter.polled.clear()
+                if waiter.error:
+                    raise waiter.error
+                if waiter.run is not None:
+                    yield waiter.run
+                if waiter.done.is_set():
+                    return
+        finally:
+            with self._cond:
+                self._remove_waiter(key, waiter)
+
+    def get_stage_durations(self) -> Dict[str, float]:
+        with self._cond:
+            return {f"{wf}:{stage}": round(d, 1) for (wf, stage), d in self._stage_durations.items()}
+
+    # --- internals ---
+
+    def _register(self, client: GitHubClient, repo, workflow_file, ref, correlation_id, dispatched_at: Optional[datetime], timeout) -> Tuple[Tuple, _Waiter]:
+        waiter = _Waiter(correlation_id, dispatched_at or datetime.now(timezone.utc), timeout)
+        key = (client, repo, workflow_file, ref)
+        with self._cond:
+            self._groups.setdefault(key, []).append(waiter)
+            # A fresh dispatch rarely shows up instantly; check again after the minimum interval.
+            self._next_poll[key] = min(self._next_poll.get(key, float("inf")), time.time() + MIN_POLL_INTERVAL)
+            self._ensure_thread()
+            self._cond.notify()
+        return key, waiter
+
+    def _await(self, key, waiter: _Waiter, event: threading.Event):
+        """
+        Blocks until `event` is set, restarting the poll thread if it died. Past the waiter's
+        deadline (plus WAITER_GRACE) it is removed and fails with TimeoutError.
+        """
+        while not event.wait(timeout=WAITER_CHECK_INTERVAL):
+            with self._cond:
+                if time.time() > waiter.deadline + WAITER_GRACE:
+                    self._remove_waiter(key, waiter)
+                    waiter.error = TimeoutError(f"Timed out waiting for workflow run {waiter.correlation_id} to complete.")
+                    waiter.done.set()
+                    waiter.polled.set()
+                    return
+                self._ensure_thread()
+
+    def _remove_waiter(self, key, waiter: _Waiter):
+        # Caller holds self._cond.
+        remaining = [w for w in self._groups.get(key, []) if w is not waiter]
+        if remaining:
+            self._groups[key] = remaining
+        else:
+            self._groups.pop(key, None)
+            self._next_poll.pop(key, None)
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="github-poll-scheduler", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                with self._cond:
+                    while not self._groups:
+                        self._cond.wait()
+                    now = time.time()
+                    due = [key for key, at in self._next_poll.items() if at <= now]
+                    if not due:
+                        self._cond.wait(timeout=min(self._next_poll.values()) - now)
+                        continue
+                    batches = [(key, list(self._groups[key])) for key in due]
+                for key, waiters in batches:
+                    try:
+                        self._poll_group(key, waiters)
+                    except Exception as e:
+                        logger.exception(f"[poll_scheduler] Polling {key[2]} failed: {e}")
+                        with self._cond:
+                            if key in self._next_poll:
+                                self._next_poll[key] = time.time() + DEFAULT_POLL_INTERVAL
+            except Exception as e:
+                # Never let the shared thread die; every waiter depends on it.
+                logger.exception(f"[poll_scheduler] Poll loop error: {e}")
+                time.sleep(MIN_POLL_INTERVAL)
+
+    def _poll_group(self, key, waiters: List[_Waiter]):
+        client, repo, workflow_file, ref = key
+        try:
+            runs = self._list_runs(client, repo, workflow_file, ref, min(w.dispatched_at for w in waiters))
+            error = None
+        except Exception as e:
+            logger.warning(f"[poll_scheduler] Listing runs of {workflow_file} failed: {e}")
+            runs, error = [], e
+        now = time.time()
+        finished = []
+        for waiter in waiters:
+            run = next((r for r in runs if run_matches(r, waiter.correlation_id)), None)
+            if run:
+                self._advance(workflow_file, waiter, run, now)
+            if waiter.done.is_set():
+                finished.append(waiter)
+            elif now > waiter.deadline:
+                waiter.error = TimeoutError(f"Timed out waiting for workflow run {waiter.correlation_id} to complete.")
+                if error:
+                    waiter.error.__cause__ = error
+                waiter.done.set()
+                finished.append(waiter)
+            waiter.polled.set()
+        with self._cond:
+            remaining = [w for w in self._groups.get(key, []) if w not in finished]
+            if remaining:
+                self._groups[key] = remaining
+                self._next_poll[key] = now + self._next_interval(client, workflow_file, remaining, now)
+            else:
+                self._groups.pop(key, None)
+                self._next_poll.pop(key, None)
+
+    def _list_runs(self, client: GitHubClient, repo, workflow_file, ref, since: datetime) -> List[dict]:
+        url = f"{GITHUB_API}/repos/{repo}/actions/workflows/{workflow_file}/runs"
+        # Allow for clock skew between us and GitHub.
+        created = (since - timedelta(minutes=2)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        params = {"branch": ref, "event": "workflow_dispatch", "per_page": 100, "created": f">={created}"}
+        resp = client.get(url, params=params, etag_cache=True)
+        resp.raise_for_status()
+        return resp.json().get("workflow_runs", [])
+
+    def _advance(self, workflow_file, waiter: _Waiter, run: dict, now: float):
+        waiter.run_id = run["id"]
+        waiter.run = run
+        status = run["status"]
+        stage = "completed" if status == "completed" else ("in_progress" if status == "in_progress" else "queued")
+        if stage != waiter.stage:
+            self._observe(workflow_file, waiter.stage, now - waiter.stage_started)
+            if stage == "completed" and waiter.stage == "queued":
+                # Finished between two polls; we never saw it running.
+                self._observe(workflow_file, "in_progress", 0.0)
+            print(f"Workflow run {run['id']} ({waiter.correlation_id}) status: {status} (conclusion: {run.get('conclusion')})")
+            waiter.stage, waiter.stage_started = stage, now
+        if stage == "completed":
+            waiter.conclusion = run.get("conclusion")
+            waiter.done.set()
+
+    def _observe(self, workflow_file, stage, duration: float):
+        with self._cond:
+            key = (workflow_file, stage)
+            previous = self._stage_durations.get(key)
+            self._stage_durations[key] = duration if previous is None else EWMA_ALPHA * duration + (1 - EWMA_ALPHA) * previous
+
+    def _next_interval(self, client: GitHubClient, workflow_file, waiters: List[_Waiter], now: float) -> float:
+        """
+        Polls at half the expected time left in the stage of the waiter closest to finishing.
+        """
+        interval = MAX_POLL_INTERVAL
+        for waiter in waiters:
+            with self._cond:
+                expected = self._stage_durations.get((workflow_file, waiter.stage))
+            if expected is None:
+                candidate = DEFAULT_POLL_INTERVAL
+            else:
+                candidate = (expected - (now - waiter.stage_started)) / 2
+            interval = min(interval, max(candidate, MIN_POLL_INTERVAL))
+        interval *= rate_limit_factor(client)
+        nearest_deadline = min(w.deadline for w in waiters) - now
+        return max(min(interval, nearest_deadline), 0.5)
+
+
+_scheduler: Optional[PollScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_poll_scheduler() -> PollScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = PollScheduler()
+        return _scheduler
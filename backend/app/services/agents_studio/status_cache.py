@@ -0,0 +1,194 @@
+"""
+Module: status_cache.py
+Cached, batched Azure Container App status.
+
+Status reads are served from a TTL cache of rich_status per container app and
+never wait for a workflow run by default: stale entries are returned as they are
+(marked "stale") and refreshed in the background, unknown apps return None until
+their first check has finished. Entries that were read since their last refresh
+(dashboards) are refreshed shortly before they expire; after failed refreshes an
+app is retried with exponential backoff.
+All names that need a refresh within a short window are checked together in a
+single container-status.yml run, so N status checks cost one CI run, not N.
+"""
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from app.services.agents_studio.azure_status import get_containerapp_statuses_via_github, extract_containerapp_name
+
+logger = logging.getLogger(__name__)
+
+STATUS_CACHE_TTL = float(os.environ.get("STATUS_CACHE_TTL", "60"))
+STATUS_MAX_STALE = float(os.environ.get("STATUS_MAX_STALE", "900"))
+STATUS_WAIT_TIMEOUT = float(os.environ.get("STATUS_WAIT_TIMEOUT", "0"))
+STATUS_BATCH_WINDOW = 2.0
+# Suggested client retry delay while an app's first status check is running
+STATUS_RETRY_AFTER = 15
+STATUS_MAX_BATCH = 100
+
+
+def _fetch_via_github(names: List[str]) -> Dict[str, Tuple[dict, dict]]:
+    return get_containerapp_statuses_via_github(
+        os.environ.get("GITHUB_REPO"),
+        os.environ.get("GITHUB_TOKEN"),
+        names,
+        os.environ.get("AZURE_RESOURCE_GROUP"),
+        os.environ.get("AZURE_SUBSCRIPTION_ID"),
+        ref=os.environ.get("GITHUB_REF", "main")
+    )
+
+
+class StatusCache:
+    """
+    Use get_status_cache() for the shared instance.
+    """
+
+    def __init__(
+        self,
+        fetch_batch: Callable[[List[str]], Dict[str, Tuple[dict, dict]]] = _fetch_via_github,
+        ttl: float = STATUS_CACHE_TTL,
+        max_stale: float = STATUS_MAX_STALE
+    ):
+        self.fetch_batch = fetch_batch
+        self.ttl = ttl
+        self.max_stale = max_stale
+        # name -> {"metadata", "rich_status", "fetched_at", "last_read"}
+        self._entries: Dict[str, dict] = {}
+        # name -> time of the last refresh attempt, successful or not
+        self._attempted: Dict[str, float] = {}
+        # name -> consecutive failed refresh attempts
+        self._failures: Dict[str, int] = {}
+        self._pending: set = set()
+        # names in the batch being checked right now; not queued again until it is done
+        self._in_flight: set = set()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- public API ---
+
+    def get(self, url_or_name: str, wait_timeout: float = STATUS_WAIT_TIMEOUT) -> Optional[dict]:
+        return self.get_many([url_or_name], wait_timeout).get(extract_containerapp_name(url_or_name))
+
+    def get_many(self, urls_or_names: Iterable[str], wait_timeout: float = STATUS_WAIT_TIMEOUT) -> Dict[str, Optional[dict]]:
+        """
+        Returns {app_name: rich_status (with "cache_age_seconds" and "stale") or None}.
+        Cached entries return immediately, stale ones are refreshed in the background. Names that
+        were never fetched wait, together, for at most wait_timeout for one batched refresh.
+        """
+        names = [extract_containerapp_name(n) for n in urls_or_names]
+        now = time.time()
+        missing = []
+        with self._cond:
+            for name in names:
+                entry = self._entries.get(name)
+                if entry:
+                    entry["last_read"] = now
+                if entry is not None and now - entry["fetched_at"] <= self.ttl:
+                    continue
+                if name not in self._in_flight:
+                    if not self._retry_due(name, now):
+                        continue
+                    self._pending.add(name)
+                if entry is None:
+                    missing.append(name)
+            if self._pending:
+                self._ensure_thread()
+                self._cond.notify_all()
+            deadline = now + wait_timeout
+            while missing and any(self._attempted.get(name, 0) < now for name in missing):
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._cond.wait(timeout=remaining)
+            return {name: self._result(name) for name in names}
+
+    def invalidate(self, url_or_name: str):
+        with self._cond:
+            self._entries.pop(extract_containerapp_name(url_or_name), None)
+
+    def put(self, url_or_name: str, metadata: dict, rich_status: dict):
+        """Stores a status obtained elsewhere (e.g. right after a deploy)."""
+        with self._cond:
+            self._entries[extract_containerapp_name(url_or_name)] = {
+                "metadata": metadata, "rich_status": rich_status, "fetched_at": time.time(), "last_read": 0.0
+            }
+
+    # --- internals ---
+
+    def _result(self, name: str) -> Optional[dict]:
+        entry = self._entries.get(name)
+        if not entry:
+            return None
+        age = time.time() - entry["fetched_at"]
+        return dict(entry["rich_status"], cache_age_seconds=round(age, 1), stale=age > self.ttl)
+
+    def _retry_due(self, name: str, now: float) -> bool:
+        """At most one attempt per ttl / 2; after failures the gap doubles each time, up to max_stale."""
+        delay = min(self.ttl / 2 * 2 ** self._failures.get(name, 0), self.max_stale)
+        return now - self._attempted.get(name, 0) >= delay
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="container-status-refresher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._queue_hot_entries()
+                if not self._pending:
+                    self._cond.wait(timeout=max(self.ttl / 4, 1.0))
+                    continue
+            # Let concurrent readers add their names to the same batch.
+            time.sleep(STATUS_BATCH_WINDOW)
+            with self._cond:
+                batch = sorted(self._pending)[:STATUS_MAX_BATCH]
+                self._pending.difference_update(batch)
+                self._in_flight.update(batch)
+            # The status is as of when the check started; reads during the run count as reads since it.
+            started = time.time()
+            try:
+                results = self.fetch_batch(batch)
+            except Exception as e:
+                logger.warning(f"[status_cache] Batch status check of {len(batch)} apps failed: {e}")
+                results = {}
+            now = time.time()
+            with self._cond:
+                self._in_flight.difference_update(batch)
+                for name in batch:
+                    self._attempted[name] = now
+                    if name not in results:
+                        self._failures[name] = self._failures.get(name, 0) + 1
+                    else:
+                        self._failures.pop(name, None)
+                        metadata, rich_status = results[name]
+                        last_read = self._entries.get(name, {}).get("last_read", started)
+                        self._entries[name] = {"metadata": metadata, "rich_status": rich_status, "fetched_at": started, "last_read": last_read}
+                self._cond.notify_all()
+
+    def _queue_hot_entries(self):
+        """
+        Refreshes entries shortly before they expire if they were read since their last refresh,
+        so a dashboard polling them never sees a stale status. Entries nobody reads just expire.
+        """
+        now = time.time()
+        for name, entry in self._entries.items():
+            read_since_refresh = entry["last_read"] > entry["fetched_at"]
+            if name in self._in_flight:
+                continue
+            if now - entry["fetched_at"] > self.ttl * 0.8 and read_since_refresh and self._retry_due(name, now):
+                self._pending.add(name)
+
+
+_status_cache: Optional[StatusCache] = None
+_status_cache_lock = threading.Lock()
+
+
+def get_status_cache() -> StatusCache:
+    global _status_cache
+    with _status_cache_lock:
+        if _status_cache is None:
+            _status_cache = StatusCache()
+        return _status_cache
@@ -457,6 +457,7 @@ def insert_agent_deployed(data: Dict[str, Any]):
     Insert a deployed agent.
     Example:
         insert_agent_deployed({
+            'agent_id': 'agno-3f2b9c1e-...',
             'user_id': 1,
             'deployed_agent_url': 'http://...',
             'description': 'desc',
@@ -473,30 +474,33 @@ def insert_agent_deployed(data: Dict[str, Any]):
             'framework': 'agno',
             'chat_enabled': True,
             'workflow_enabled': False,
-            'error': None
+            'error': None,
+            'app_name': 'agno-16712b81-aece-42f1-9',
+            'content_hash': '2fc6c76a...',
+            'mcp_servers': [{'name': 'tavily', 'url': 'http://.../sse', 'transport': 'sse'}]
         })
     """
     conn = get_connection()
     cursor = conn.cursor()
     cursor.execute('''
-        INSERT INTO agents_deployed (user_id, deployed_agent_url, description, details, system_prompt, type, tools, sha, run_id, agent_url, server_url, client_url, status, framework, chat_enabled, workflow_enabled, error)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        INSERT INTO agents_deployed (agent_id, user_id, deployed_agent_url, description, details, system_prompt, type, tools, sha, run_id, agent_url, server_url, client_url, status, framework, chat_enabled, workflow_enabled, error, app_name, content_hash, mcp_servers)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     ''', (
-        data['user_id'], data['deployed_agent_url'], data.get('description'), data.get('details'),
+        data['agent_id'], data.get('user_id'), data['deployed_agent_url'], data.get('description'), data.get('details'),
         data.get('system_prompt'), data.get('type'), json.dumps(data.get('tools', [])),
         data.get('sha'), data.get('run_id'), data.get('agent_url'), data.get('server_url'), data.get('client_url'),
         data.get('status'), data.get('framework'),
         int(data.get('chat_enabled', False)), int(data.get('workflow_enabled', False)),
-        data.get('error')
+        data.get('error'), data.get('app_name'), data.get('content_hash'), json.dumps(data.get('mcp_servers', []))
     ))
     conn.commit()
     return cursor.rowcount
 
-def update_agent_deployed(user_id: int, data: Dict[str, Any]):
+def update_agent_deployed(agent_id: str, data: Dict[str, Any]):
     """
-    Update a deployed agent.
+    Update a deployed agent, by agent_id.
     Example:
-        update_agent_deployed(1, {
+        update_agent_deployed('agno-3f2b9c1e-...', {
             'deployed_agent_url': 'http://...',
             'description': 'desc2',
             'details': 'details2',
@@ -519,40 +523,123 @@ def update_agent_deployed(user_id: int, data: Dict[str, Any]):
     cursor = conn.cursor()
     cursor.execute('''
         UPDATE agents_deployed SET deployed_agent_url=?, description=?, details=?, system_prompt=?, type=?, tools=?, sha=?, run_id=?, agent_url=?, server_url=?, client_url=?, status=?, framework=?, chat_enabled=?, workflow_enabled=?, error=?, agent_card=?, skill_card=?
-        WHERE user_id=?
+        WHERE agent_id=?
     ''', (
         data.get('deployed_agent_url'), data.get('description'), data.get('details'),
         data.get('system_prompt'), data.get('type'), json.dumps(data.get('tools', [])),
         data.get('sha'), data.get('run_id'), data.get('agent_url'), data.get('server_url'), data.get('client_url'),
         data.get('status'), data.get('framework'),
         int(data.get('chat_enabled', False)), int(data.get('workflow_enabled', False)),
-        data.get('error'), data.get('agent_card'), data.get('skill_card'), user_id
+        data.get('error'), data.get('agent_card'), data.get('skill_card'), agent_id
     ))
     conn.commit()
     return cursor.rowcount
 
-def soft_delete_agent_deployed(user_id: int):
+def fetch_deployed_agent_by_id(agent_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Fetch one deployed agent by agent_id (primary key lookup).
+    Example:
+        agent = fetch_deployed_agent_by_id('agno-3f2b9c1e-...')
+        # Returns: dict of the row, or None
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM agents_deployed WHERE agent_id = ? AND soft_delete = 0', (agent_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    columns = [column[0] for column in cursor.description]
+    return dict(zip(columns, row))
+
+def fetch_deployed_agents_by_user(user_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Fetch the deployed agents of a user (uses IX_agents_deployed_user_id), or all agents with an agent_id when user_id is None.
+    Example:
+        agents = fetch_deployed_agents_by_user(1)
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    if user_id is None:
+        cursor.execute('SELECT * FROM agents_deployed WHERE agent_id IS NOT NULL AND soft_delete = 0')
+    else:
+        cursor.execute('SELECT * FROM agents_deployed WHERE user_id = ? AND soft_delete = 0', (user_id,))
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+# Columns that update_agent_deployed_by_id may change; JSON columns are serialized.
+AGENT_DEPLOYED_UPDATABLE_COLUMNS = {
+    'deployed_agent_url', 'description', 'details', 'system_prompt', 'type', 'tools', 'sha', 'run_id',
+    'agent_url', 'server_url', 'client_url', 'status', 'framework', 'chat_enabled', 'workflow_enabled',
+    'error', 'agent_card', 'skill_card', 'app_name', 'content_hash', 'mcp_servers'
+}
+AGENT_DEPLOYED_JSON_COLUMNS = {'tools', 'mcp_servers'}
+
+def update_agent_deployed_by_id(agent_id: str, data: Dict[str, Any]):
+    """
+    Update only the given columns of a deployed agent, by agent_id.
+    Example:
+        update_agent_deployed_by_id('agno-3f2b9c1e-...', {'status': 'deployed', 'deployed_agent_url': 'https://...'})
+    """
+    columns = [column for column in data if column in AGENT_DEPLOYED_UPDATABLE_COLUMNS]
+    if not columns:
+        return 0
+    values = []
+    for column in columns:
+        value = data[column]
+        if column in AGENT_DEPLOYED_JSON_COLUMNS:
+            value = json.dumps(value)
+        elif column in ('chat_enabled', 'workflow_enabled'):
+            value = int(bool(value))
+        values.append(value)
+    conn = get_connection()
+    cursor = conn.cursor()
+    assignments = ', '.join(f'{column}=?' for column in columns)
+    cursor.execute(f'UPDATE agents_deployed SET {assignments} WHERE agent_id=?', values + [agent_id])
+    conn.commit()
+    return cursor.rowcount
+
+def soft_delete_agents_deployed_by_app_name(app_names: List[str], status: str = 'deleted') -> List[str]:
+    """
+    Soft delete many deployed agents by container app name in one transaction.
+    Returns the agent_ids that were updated.
+    Example:
+        soft_delete_agents_deployed_by_app_name(['agno-16712b81-aece-42f1-9', 'langgraph-50f7ea95-2351-4d60-8'])
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    agent_ids = []
+    # SQL Server allows at most 2100 parameters per statement
+    for start in range(0, len(app_names), 1000):
+        chunk = app_names[start:start + 1000]
+        placeholders = ','.join(['?'] * len(chunk))
+        cursor.execute(f'SELECT agent_id FROM agents_deployed WHERE app_name IN ({placeholders}) AND soft_delete = 0', chunk)
+        agent_ids += [row[0] for row in cursor.fetchall()]
+        cursor.execute(f"UPDATE agents_deployed SET soft_delete=1, status=?, deployed_agent_url='' WHERE app_name IN ({placeholders})", [status] + chunk)
+    conn.commit()
+    return agent_ids
+
+def soft_delete_agent_deployed(agent_id: str):
     """
-    Soft delete a deployed agent.
+    Soft delete a deployed agent, by agent_id.
     Example:
-        soft_delete_agent_deployed(1)
+        soft_delete_agent_deployed('agno-3f2b9c1e-...')
     """
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute('UPDATE agents_deployed SET soft_delete=1 WHERE user_id=?', (user_id,))
+    cursor.execute('UPDATE agents_deployed SET soft_delete=1 WHERE agent_id=?', (agent_id,))
     conn.commit()
     return cursor.rowcount
 
 # -------------------
-def delete_agent_deployed(user_id: int):
+def delete_agent_deployed(agent_id: str):
     """
-    Permanently delete a deployed agent.
+    Permanently delete a deployed agent, by agent_id.
     Example:
-        delete_agent_deployed(1)
+        delete_agent_deployed('agno-3f2b9c1e-...')
     """
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute('DELETE FROM agents_deployed WHERE user_id=?', (user_id,))
+    cursor.execute('DELETE FROM agents_deployed WHERE agent_id=?', (agent_id,))
     conn.commit()
     return cursor.rowcount
 